@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+# search_files.py vs. the process_file_attended.py loop (keyword in line, for
+# every line and keyword) over a synthetic corpus of log files:
+#
+#   python3 benchmarks/search_files.py --files 2000 --file-kb 512 --keywords 20
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+from search_files import search  # noqa: E402
+
+LEVELS = ["INFO", "INFO", "INFO", "DEBUG", "WARN", "ERROR"]
+WORDS = ["request", "served", "cache", "miss", "user", "login", "upload", "retry", "db", "query"]
+
+
+def build_corpus(directory, files, file_kb, rnd):
+    paths = []
+    for i in range(files):
+        path = os.path.join(directory, f"app-{i:05}.log")
+        lines = []
+        size = 0
+        while size < file_kb * 1024:
+            line = (f"2026-10-18T12:{rnd.randint(0, 59):02}:{rnd.randint(0, 59):02} {rnd.choice(LEVELS)} "
+                    f"{' '.join(rnd.choice(WORDS) for _ in range(6))} id={rnd.randint(0, 10 ** 6)}\n")
+            lines.append(line)
+            size += len(line)
+        with open(path, 'w') as f:
+            f.write(''.join(lines))
+        paths.append(path)
+    return paths
+
+
+def line_loop(paths, keywords):
+    n = 0
+    for path in paths:
+        with open(path, "r") as f:
+            for line in f:
+                if any(keyword in line for keyword in keywords):
+                    n += 1
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="keyword search benchmark")
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--file-kb', type=int, default=512)
+    parser.add_argument('--keywords', type=int, default=20)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count()])
+    parser.add_argument('--dir', default=None, help="where to put the corpus")
+    args = parser.parse_args()
+
+    rnd = random.Random(3)
+    # rare ids, so hits are sparse as in a real search
+    keywords = [f"id={rnd.randint(0, 10 ** 6)}\n" for _ in range(args.keywords)]
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        paths = build_corpus(tmp, args.files, args.file_kb, rnd)
+        size = sum(os.path.getsize(p) for p in paths)
+        print(f"corpus: {len(paths):,} files, {size / 1e6:,.0f} MB, {len(keywords)} keywords")
+
+        start = time.perf_counter()
+        n = line_loop(paths, keywords)
+        elapsed = time.perf_counter() - start
+        print(f"{'line loop':<18} {n:>8,} lines  {elapsed:8.2f}s  {size / elapsed / 1e6:8.1f} MB/s")
+
+        encoded = [k.encode() for k in keywords]
+        for workers in dict.fromkeys(args.workers):
+            start = time.perf_counter()
+            n = sum(len(results) for _, results in search(paths, encoded, workers))
+            elapsed = time.perf_counter() - start
+            label = f"mmap x{workers} workers"
+            print(f"{label:<18} {n:>8,} lines  {elapsed:8.2f}s  {size / elapsed / 1e6:8.1f} MB/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,18 @@
 #!/usr/bin/env python3
 
+# Interactive version of search_files.py: one file, one keyword.
+# For many files or keywords at once, run search_files.py directly.
+from search_files import search_file
+
 filename = input("Enter filename: ")
 keyword = input("Enter keyword to find: ")
 
 try:
-    with open(filename, "r") as f:
-        for line in f:
-            if keyword in line:  # Example logic
-                print(f"Found keyword in: {line.strip()}") # strip removes newline
+    results = search_file(filename, [keyword.encode("utf-8")])
 except FileNotFoundError:
-    print("File not found.")
\ No newline at end of file
+    print("File not found.")
+except (OSError, ValueError) as e:
+    print("Could not read file:", e)
+else:
+    for line_no, line, _ in results:
+        print(f"Found keyword in: {line.decode('utf-8', 'replace').strip()}") # strip removes surrounding whitespace
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+# Find lines containing any of several keywords across many files.
+#
+#   python3 search_files.py -k ERROR -k timeout 'logs/**/*.log' data.csv
+#   python3 search_files.py --keywords-file ips.txt /var/log --workers 8 --count
+#
+# Each file is memory-mapped and searched with bytes.find over the whole buffer,
+# once per keyword, so no time is spent splitting lines that don't match. Line
+# numbers are only worked out for the hits, counting newlines from one hit to
+# the next. Files are spread over a process pool; results are printed in the
+# order the files were given (grep style: path:line:text).
+
+import argparse
+import concurrent.futures
+import glob
+import mmap
+import os
+import sys
+
+
+# bytes copied at a time when counting newlines between hits
+COUNT_WINDOW = 1024 * 1024
+
+
+def count_newlines(mm, start, end, window=COUNT_WINDOW):
+    # newlines in mm[start:end], copying at most `window` bytes at a time
+    n = 0
+    for pos in range(start, end, window):
+        n += mm[pos:min(pos + window, end)].count(b'\n')
+    return n
+
+
+def search_file(path, keywords):
+    # [(line number, line, [keywords found on it]), ...] in line order;
+    # raises OSError if the file can't be read, ValueError if it can't be mapped
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        hits = {}
+        for keyword in keywords:
+            pos = mm.find(keyword)
+            while pos != -1:
+                # note the line once, then carry on after it
+                start = mm.rfind(b'\n', 0, pos) + 1
+                hits.setdefault(start, []).append(keyword)
+                end = mm.find(b'\n', pos + len(keyword))
+                if end == -1:
+                    break
+                pos = mm.find(keyword, end + 1)
+        results = []
+        line_no = 1
+        counted_to = 0
+        for start in sorted(hits):
+            # newlines between the previous hit and this one
+            line_no += count_newlines(mm, counted_to, start)
+            counted_to = start
+            end = mm.find(b'\n', start)
+            line = mm[start:end if end != -1 else size].rstrip(b'\r')
+            results.append((line_no, line, hits[start]))
+        return results
+
+
+def _search_file_or_error(path, keywords):
+    # pool worker: one unreadable file shouldn't stop the whole search
+    try:
+        return search_file(path, keywords)
+    except (OSError, ValueError) as e:
+        return e
+
+
+def expand_paths(patterns):
+    # files, directories (searched recursively) and globs (** allowed), in the order given
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        for path in matches:
+            if os.path.isdir(path):
+                for root, dirs, files in os.walk(path):
+                    dirs.sort()
+                    for name in sorted(files):
+                        full = os.path.join(root, name)
+                        if full not in seen:
+                            seen.add(full)
+                            yield full
+            elif path not in seen:
+                seen.add(path)
+                yield path
+
+
+def search(paths, keywords, workers=None):
+    # (path, results) for every path, in order; results is an OSError for unreadable files
+    paths = list(paths)
+    if workers == 1:
+        for path in paths:
+            yield path, _search_file_or_error(path, keywords)
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, min(32, len(paths) // (4 * (workers or os.cpu_count()))))
+        yield from zip(paths, pool.map(_search_file_or_error, paths, [keywords] * len(paths), chunksize=chunksize))
+
+
+def read_keywords(path):
+    with open(path, 'rb') as f:
+        return [line.rstrip(b'\r\n') for line in f if line.strip()]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="search many files for many keywords")
+    parser.add_argument('paths', nargs='+', help="files, directories or globs (quote globs)")
+    parser.add_argument('-k', '--keyword', action='append', default=[], help="keyword to find (repeatable)")
+    parser.add_argument('--keywords-file', help="file with one keyword per line")
+    parser.add_argument('--workers', type=int, default=None, help="processes to use (default: one per CPU)")
+    parser.add_argument('--count', action='store_true', help="only print the number of matching lines per file")
+    args = parser.parse_args()
+
+    keywords = [k.encode('utf-8') for k in args.keyword]
+    if args.keywords_file:
+        keywords += read_keywords(args.keywords_file)
+    keywords = [k for k in dict.fromkeys(keywords) if k]
+    if not keywords:
+        parser.error("give at least one --keyword or a --keywords-file")
+
+    out = sys.stdout.buffer
+    failed = False
+    matched = 0
+    for path, results in search(expand_paths(args.paths), keywords, args.workers):
+        if isinstance(results, Exception):
+            print(f"{path}: {results}", file=sys.stderr)
+            failed = True
+            continue
+        matched += len(results)
+        prefix = path.encode('utf-8', 'surrogateescape')
+        if args.count:
+            out.write(b'%s:%d\n' % (prefix, len(results)))
+        else:
+            out.write(b''.join(b'%s:%d:%s\n' % (prefix, line_no, line) for line_no, line, _ in results))
+    out.flush()
+    # grep's convention: 0 if anything matched, 1 if nothing did, 2 on errors
+    sys.exit(2 if failed else 0 if matched else 1)
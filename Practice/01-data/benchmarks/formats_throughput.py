@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+# Read/write throughput of every formats.py format on a synthetic mock_data file,
+# and the peak memory of each run (each one runs in its own process):
+#
+#   python3 benchmarks/formats_throughput.py --rows 10000000
+#   python3 benchmarks/formats_throughput.py --rows 1000000 --formats json xml --gzip
+
+import argparse
+import csv
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+import formats  # noqa: E402
+
+SOURCE = os.path.join(HERE, '..', 'mock_data.csv')
+
+
+def synthetic_rows(n):
+    # the column list, then n rows cycled from the 100 sample rows with fresh ids
+    with open(SOURCE, newline='') as f:
+        reader = csv.reader(f)
+        columns = next(reader)
+        sample = [row[1:] for row in reader]
+    yield columns
+    rnd = random.Random(0)
+    for i in range(n):
+        yield (i + 1, *rnd.choice(sample))
+
+
+def run_write(path, rows):
+    return formats.write_rows(path, synthetic_rows(rows))
+
+
+def run_read(path):
+    n = -1
+    for _ in formats.read_rows(path):
+        n += 1
+    return n
+
+
+def child(results, fn, args):
+    start = time.perf_counter()
+    n = fn(*args)
+    elapsed = time.perf_counter() - start
+    results.put((n, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+
+def measure(fn, *args):
+    results = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=child, args=(results, fn, args))
+    proc.start()
+    outcome = results.get()
+    proc.join()
+    return outcome
+
+
+def main():
+    parser = argparse.ArgumentParser(description="formats.py throughput per format")
+    parser.add_argument('--rows', type=int, default=10000000)
+    parser.add_argument('--formats', nargs='+', default=sorted(formats.WRITERS))
+    parser.add_argument('--gzip', action='store_true', help="write and read .gz files")
+    parser.add_argument('--dir', default=None, help="where to put the scratch files")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        for fmt in args.formats:
+            path = os.path.join(tmp, f"mock_data.{fmt}" + ('.gz' if args.gzip else ''))
+            n, elapsed, rss = measure(run_write, path, args.rows)
+            size = os.path.getsize(path)
+            print(f"{fmt:<5} write {n:>12,} rows {elapsed:8.1f}s {n / elapsed:12,.0f} rows/s "
+                  f"{size / elapsed / 1e6:7.1f} MB/s  peak {rss / 1024:6.0f} MB")
+            n, elapsed, rss = measure(run_read, path)
+            print(f"{fmt:<5} read  {n:>12,} rows {elapsed:8.1f}s {n / elapsed:12,.0f} rows/s "
+                  f"{size / elapsed / 1e6:7.1f} MB/s  peak {rss / 1024:6.0f} MB")
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
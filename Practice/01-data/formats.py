@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+
+# Streaming readers and writers for the mock_data formats, and any-to-any conversion.
+#
+#   python3 formats.py mock_data.xml mock_data_out.json
+#   python3 formats.py mock_data.sql.gz - --to csv | head
+#   python3 formats.py mock_data.json out.sql --table people
+#
+# Every reader yields the column names first, then one tuple per row. Every
+# writer takes an output stream, the column names and an iterator of rows.
+# Nothing holds more than one record (or one read buffer) at a time: CSV/TSV go
+# row by row, JSON arrays are decoded one element at a time, XML is walked with
+# iterparse and each record is cleared once read, and SQL files are split into
+# INSERT statements and tokenized one statement at a time.
+#
+# New formats plug in with the @reader / @writer decorators.
+
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+
+READ_SIZE = 1024 * 1024
+
+# name -> (function, binary); binary streams are opened for formats whose parser wants bytes
+READERS = {}
+WRITERS = {}
+
+
+def reader(name, binary=False):
+    def register(fn):
+        READERS[name] = (fn, binary)
+        return fn
+    return register
+
+
+def writer(name, binary=False):
+    def register(fn):
+        WRITERS[name] = (fn, binary)
+        return fn
+    return register
+
+
+def format_of(path):
+    # "mock_data.sql.gz" -> "sql"
+    if path.endswith('.gz'):
+        path = path[:-3]
+    return os.path.splitext(path)[1].lower().lstrip('.')
+
+
+def open_stream(path, mode, binary):
+    # .gz paths are (de)compressed on the fly, - is stdin/stdout
+    if path == '-':
+        raw = sys.stdin.buffer if mode == 'r' else sys.stdout.buffer
+        return raw if binary else io.TextIOWrapper(raw, encoding='utf-8', newline='')
+    if path.endswith('.gz'):
+        if binary:
+            return gzip.open(path, mode + 'b')
+        return gzip.open(path, mode + 't', encoding='utf-8', newline='')
+    if binary:
+        return open(path, mode + 'b', buffering=READ_SIZE)
+    return open(path, mode, buffering=READ_SIZE, encoding='utf-8', newline='')
+
+
+def read_rows(path, fmt=None):
+    fmt = fmt or format_of(path)
+    if fmt not in READERS:
+        raise ValueError(f"don't know how to read {fmt or path} files")
+    fn, binary = READERS[fmt]
+    with open_stream(path, 'r', binary) as f:
+        yield from fn(f)
+
+
+def write_rows(path, rows, fmt=None, **options):
+    # rows: the column list first, then the rows, as read_rows yields them
+    fmt = fmt or format_of(path)
+    if fmt not in WRITERS:
+        raise ValueError(f"don't know how to write {fmt or path} files")
+    fn, binary = WRITERS[fmt]
+    rows = iter(rows)
+    columns = next(rows)
+    f = open_stream(path, 'w', binary)
+    try:
+        return fn(f, columns, rows, **options)
+    finally:
+        if path == '-':
+            f.flush()
+            if not binary:
+                f.detach()
+        else:
+            f.close()
+
+
+def convert(in_path, out_path, in_format=None, out_format=None, **options):
+    # any format to any other, one row at a time; returns the number of rows
+    return write_rows(out_path, read_rows(in_path, in_format), out_format, **options)
+
+
+# --- CSV / TSV ---
+
+@reader('csv')
+def read_csv(f, delimiter=','):
+    rows = csv.reader(f, delimiter=delimiter)
+    yield next(rows)
+    yield from map(tuple, rows)
+
+
+@reader('tsv')
+def read_tsv(f):
+    return read_csv(f, '\t')
+
+
+@writer('csv')
+def write_csv(f, columns, rows, delimiter=','):
+    out = csv.writer(f, delimiter=delimiter, lineterminator='\n')
+    out.writerow(columns)
+    n = 0
+    for row in rows:
+        out.writerow(row)
+        n += 1
+    return n
+
+
+@writer('tsv')
+def write_tsv(f, columns, rows):
+    return write_csv(f, columns, rows, '\t')
+
+
+# --- JSON: a top-level array of flat objects ---
+
+# characters that can continue a number, so a number at the end of the buffer
+# isn't complete until the next read says so
+NUMBER_CHARS = frozenset('0123456789+-.eE')
+
+
+# characters that can continue a number: one at the end of the buffer isn't
+# complete until the next read (or EOF) says so
+NUMBER_CHARS = frozenset('0123456789+-.eE')
+
+
+def iter_json_array(f, read_size=READ_SIZE):
+    # yield the elements of a top-level JSON array without loading the whole document
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    # characters, newlines and the current column of the text already dropped
+    # from buf, so errors point into the file rather than into the buffer
+    dropped = [0, 0, 0]
+    started = False
+    eof = False
+
+    def drop(buf, pos):
+        gone = buf[:pos]
+        newlines = gone.count('\n')
+        dropped[0] += pos
+        dropped[1] += newlines
+        dropped[2] = len(gone) - gone.rfind('\n') - 1 if newlines else dropped[2] + len(gone)
+        return buf[pos:]
+
+    while True:
+        # skip whitespace and separators between elements
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            chunk = f.read(read_size)
+            eof = not chunk
+            buf, pos = drop(buf, pos) + chunk, 0
+        if pos >= len(buf):
+            return
+        if not started:
+            if buf[pos] != '[':
+                raise ValueError("expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if buf[pos] == ']':
+            return
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+            if not eof and isinstance(value, (int, float)) and (end == len(buf) or buf[end] in NUMBER_CHARS):
+                # '10' or '10.' at the end of the buffer may continue in the next read
+                raise json.JSONDecodeError("truncated", buf, end)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise _file_error(e, dropped) from None
+            # element not complete yet: read more and retry
+            chunk = f.read(read_size)
+            eof = not chunk
+            buf, pos = drop(buf, pos) + chunk, 0
+            continue
+        yield value
+        pos = end
+        if pos > read_size:
+            buf, pos = drop(buf, pos), 0
+
+
+def _file_error(e, dropped):
+    # e's position is in the buffer; move it to where it is in the file
+    chars, lines, col = dropped
+    lineno = lines + e.lineno
+    colno = col + e.colno if e.lineno == 1 else e.colno
+    err = json.JSONDecodeError(e.msg, e.doc, e.pos)
+    err.pos, err.lineno, err.colno = chars + e.pos, lineno, colno
+    err.args = (f"{e.msg}: line {lineno} column {colno} (char {chars + e.pos})",)
+    return err
+
+
+@reader('json')
+def read_json(f):
+    # columns come from the first object; later objects missing one get None
+    columns = None
+    for obj in iter_json_array(f):
+        if columns is None:
+            columns = list(obj)
+            yield columns
+        yield tuple(obj.get(col) for col in columns)
+
+
+@writer('json')
+def write_json(f, columns, rows):
+    # same layout as mock_data.json: one object per line inside [ ... ]
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    f.write('[')
+    n = 0
+    for row in rows:
+        f.write((',\n' if n else '') + encode(dict(zip(columns, row))))
+        n += 1
+    f.write(']\n')
+    return n
+
+
+# --- XML: <dataset><record><column>value</column>...</record>...</dataset> ---
+
+@reader('xml', binary=True)
+def read_xml(f):
+    # each child of the root element is one record, each of its children one field
+    columns = None
+    root = None
+    depth = 0
+    for event, elem in ET.iterparse(f, events=('start', 'end')):
+        if event == 'start':
+            depth += 1
+            if root is None:
+                root = elem
+            continue
+        depth -= 1
+        if depth != 1:
+            continue
+        record = {child.tag: child.text or '' for child in elem}
+        if columns is None:
+            columns = list(record)
+            yield columns
+        yield tuple(record.get(col) for col in columns)
+        # drop the finished record so the tree never grows past one record
+        elem.clear()
+        root.remove(elem)
+
+
+@writer('xml')
+def write_xml(f, columns, rows, root='dataset', record='record'):
+    f.write(f"<?xml version='1.0' encoding='UTF-8'?>\n<{root}>\n")
+    opening = [f"<{col}>" for col in columns]
+    closing = [f"</{col}>" for col in columns]
+    n = 0
+    for row in rows:
+        parts = [f"<{record}>"]
+        for open_tag, close_tag, value in zip(opening, closing, row):
+            # NULLs are left out; the reader turns missing fields back into None
+            if value is not None:
+                parts.append(open_tag + escape(str(value)) + close_tag)
+        parts.append(f"</{record}>\n")
+        f.write(''.join(parts))
+        n += 1
+    f.write(f"</{root}>\n")
+    return n
+
+
+# --- SQL: insert into t (a, b) values (...), (...); ---
+
+SQL_INSERT = re.compile(r'insert\s+into\s+\S+\s*\(([^)]*)\)\s*values\s*', re.IGNORECASE)
+SQL_VALUE = re.compile(r"""\s*(?:'((?:[^'\\]|\\.|'')*)'|(NULL)|([-+0-9.eE]+))\s*(,|\))""", re.IGNORECASE)
+SQL_UNESCAPE = re.compile(r"\\(.)|''")
+SQL_SPECIAL = re.compile(r"[';\\]")
+
+
+def _unescape(text):
+    if '\\' not in text and "''" not in text:
+        return text
+    escapes = {'n': '\n', 't': '\t', 'r': '\r', '0': '\0'}
+    return SQL_UNESCAPE.sub(lambda m: "'" if m.group(1) is None else escapes.get(m.group(1), m.group(1)), text)
+
+
+_column_lists = {}
+
+
+def parse_insert(statement):
+    # "insert into t (a, b) values (1, 'x'), (2, 'y');" -> (columns, [rows])
+    m = SQL_INSERT.match(statement)
+    if not m:
+        return None, []
+    # every statement in a dump usually repeats the same column list
+    columns = _column_lists.get(m.group(1))
+    if columns is None:
+        columns = [c.strip().strip('`') for c in m.group(1).split(',')]
+        if len(_column_lists) < 100:
+            _column_lists[m.group(1)] = columns
+    value = SQL_VALUE.match
+    rows = []
+    pos = m.end()
+    end = len(statement)
+    while True:
+        while pos < end and statement[pos] in ' \t\r\n,':
+            pos += 1
+        if pos >= end or statement[pos] != '(':
+            break
+        pos += 1
+        row = []
+        while True:
+            v = value(statement, pos)
+            if not v:
+                raise ValueError(f"can't parse values at: {statement[pos:pos + 40]!r}")
+            quoted, null, number, sep = v.groups()
+            if quoted is not None:
+                row.append(_unescape(quoted))
+            elif null:
+                row.append(None)
+            else:
+                row.append(number)
+            pos = v.end()
+            if sep == ')':
+                break
+        rows.append(tuple(row))
+    return list(columns), rows
+
+
+def iter_statements(f):
+    # split a .sql stream into statements on ; outside of quotes,
+    # jumping between quote/semicolon/backslash characters only
+    buf = []
+    in_quote = False
+    for line in f:
+        start = 0
+        skip_to = 0
+        for m in SQL_SPECIAL.finditer(line):
+            i = m.start()
+            if i < skip_to:
+                continue
+            ch = line[i]
+            if ch == '\\':
+                if in_quote:
+                    skip_to = i + 2
+            elif ch == "'":
+                in_quote = not in_quote
+            elif not in_quote:
+                buf.append(line[start:i])
+                yield ''.join(buf).strip()
+                buf = []
+                start = i + 1
+        buf.append(line[start:])
+    rest = ''.join(buf).strip()
+    if rest:
+        yield rest
+
+
+@reader('sql')
+def read_sql(f):
+    columns = None
+    for statement in iter_statements(f):
+        cols, rows = parse_insert(statement)
+        if cols is None:
+            continue
+        if columns is None:
+            columns = cols
+            yield columns
+        elif cols != columns:
+            raise ValueError(f"column list changed mid-file: {cols}")
+        yield from rows
+
+
+def sql_literal(value):
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace('\\', '\\\\').replace("'", "''") + "'"
+
+
+@writer('sql')
+def write_sql(f, columns, rows, table='MOCK_DATA'):
+    # one statement per row, like mock_data.sql
+    prefix = f"insert into {table} ({', '.join(columns)}) values ("
+    n = 0
+    for row in rows:
+        f.write(prefix + ', '.join(map(sql_literal, row)) + ');\n')
+        n += 1
+    return n
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="convert between csv, tsv, json, xml and sql")
+    parser.add_argument('input', help="file to read, .gz ok, - for stdin (needs --from)")
+    parser.add_argument('output', help="file to write, .gz ok, - for stdout (needs --to)")
+    parser.add_argument('--from', dest='in_format', choices=sorted(READERS))
+    parser.add_argument('--to', dest='out_format', choices=sorted(WRITERS))
+    parser.add_argument('--table', default='MOCK_DATA', help="table name for sql output")
+    args = parser.parse_args()
+
+    options = {}
+    if (args.out_format or format_of(args.output)) == 'sql':
+        options['table'] = args.table
+    n = convert(args.input, args.output, args.in_format, args.out_format, **options)
+    print(f"converted {n:,} rows", file=sys.stderr)
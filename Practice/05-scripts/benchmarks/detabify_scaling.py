@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+# detabify --workers scaling: one large TSV converted with 1..N processes,
+# checking each output against the serial one.
+#
+#   python3 benchmarks/detabify_scaling.py --size-mb 2048 --max-workers 8
+
+import argparse
+import filecmp
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+sys.path.insert(0, HERE)
+from detabify import convert_file, convert_file_parallel  # noqa: E402
+from detabify_throughput import build_input  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="detabify parallel scaling")
+    parser.add_argument('--size-mb', type=int, default=2048)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-mb', type=int, default=32)
+    parser.add_argument('--dir', default=None, help="where to put the scratch files")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        tsv = os.path.join(tmp, 'big.tsv')
+        size = build_input(tsv, args.size_mb)
+        print(f"input: {size / 1e6:,.0f} MB")
+        serial = os.path.join(tmp, 'serial.csv')
+        start = time.perf_counter()
+        convert_file(tsv, serial)
+        base = time.perf_counter() - start
+        print(f"{'serial':<10} {base:8.2f}s  {size / base / 1e6:8.1f} MB/s")
+        out = os.path.join(tmp, 'parallel.csv')
+        workers = 1
+        while workers <= args.max_workers:
+            start = time.perf_counter()
+            convert_file_parallel(tsv, out, workers, chunk_size=args.chunk_mb * 1024 * 1024)
+            elapsed = time.perf_counter() - start
+            same = filecmp.cmp(serial, out, shallow=False)
+            print(f"{workers:>2} workers {elapsed:8.2f}s  {size / elapsed / 1e6:8.1f} MB/s  "
+                  f"x{base / elapsed:4.2f}  {'identical' if same else 'DIFFERENT'}")
+            workers *= 2
+
+
+if __name__ == '__main__':
+    main()
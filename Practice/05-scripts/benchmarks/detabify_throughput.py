@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+# TSV -> CSV throughput: the old per-line regex conversion vs. detabify.convert_file.
+# Builds a large TSV by repeating the rows of Practice/01-data/mock_data.tsv:
+#
+#   python3 benchmarks/detabify_throughput.py --size-mb 2048
+#   python3 benchmarks/detabify_throughput.py --size-mb 256 --gzip
+
+import argparse
+import io
+import os
+import re
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+from detabify import convert_file  # noqa: E402
+
+MOCK_DATA = os.path.join(HERE, '..', '..', '01-data', 'mock_data.tsv')
+
+
+def regex_convert(in_path, out_path):
+    # what detabify.convert used to do, kept here for comparison
+    csv = io.open(out_path, mode="w", encoding="utf-8")
+    with io.open(in_path, mode="r", encoding="utf-8") as tsv:
+        for line in tsv:
+            csv.write(re.sub('\t', ',', re.sub('(^|[\t])([^\t]*\\,[^\t\n]*)', r'\1"\2"', line)))
+    csv.close()
+
+
+def build_input(path, size_mb):
+    with open(MOCK_DATA, 'rb') as f:
+        header = f.readline()
+        body = f.read()
+    if not body.endswith(b'\n'):
+        body += b'\n'
+    block = body * max(1, (8 * 1024 * 1024) // len(body))
+    target = size_mb * 1024 * 1024
+    with open(path, 'wb') as out:
+        out.write(header)
+        written = len(header)
+        while written < target:
+            out.write(block)
+            written += len(block)
+    return written
+
+
+def timed(label, size, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {elapsed:8.2f}s  {size / elapsed / 1e6:8.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TSV -> CSV throughput")
+    parser.add_argument('--size-mb', type=int, default=2048)
+    parser.add_argument('--dir', default=None, help="where to put the scratch files")
+    parser.add_argument('--gzip', action='store_true', help="also time gzip output")
+    parser.add_argument('--skip-regex', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        tsv = os.path.join(tmp, 'big.tsv')
+        size = build_input(tsv, args.size_mb)
+        print(f"input: {size / 1e6:,.0f} MB")
+        if not args.skip_regex:
+            timed("regex per line", size, lambda: regex_convert(tsv, os.path.join(tmp, 'regex.csv')))
+        timed("csv engine", size, lambda: convert_file(tsv, os.path.join(tmp, 'engine.csv')))
+        if args.gzip:
+            timed("csv engine -> .gz", size, lambda: convert_file(tsv, os.path.join(tmp, 'engine.csv.gz')))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+# Multi-pattern log filtering: the script-sample.py way (a leading-.* regex
+# searched on every line) vs. log_filter.py, on a synthetic access log.
+#
+#   python3 benchmarks/log_filter_throughput.py --size-mb 1024 --patterns 300
+
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+from log_filter import filter_stream, trie_regex  # noqa: E402
+
+PATHS = ["/", "/index.html", "/api/hobbies", "/api/tracking/2024/5", "/static/app.js", "/login"]
+AGENTS = ["Mozilla/5.0 (X11; Linux x86_64)", "curl/8.4.0", "python-requests/2.31.0"]
+
+
+def random_ip(rnd):
+    return ".".join(str(rnd.randint(1, 254)) for _ in range(4))
+
+
+def build_log(path, size_mb, targets, hit_rate, rnd):
+    # nginx-ish lines; about hit_rate of them come from one of the target IPs
+    target = size_mb * 1024 * 1024
+    written = 0
+    with open(path, 'w', buffering=1024 * 1024) as out:
+        while written < target:
+            lines = []
+            for _ in range(10000):
+                ip = rnd.choice(targets) if rnd.random() < hit_rate else random_ip(rnd)
+                lines.append(f'{random_ip(rnd)} - - [18/Oct/2026:12:00:00 +0000] "GET {rnd.choice(PATHS)} HTTP/1.1" '
+                             f'200 {rnd.randint(100, 99999)} "-" "{rnd.choice(AGENTS)}" fwd="{ip}"\n')
+            block = ''.join(lines)
+            out.write(block)
+            written += len(block)
+    return written
+
+
+def per_line_regex(path, patterns, out_path):
+    # script-sample.py's approach, with every pattern in one alternation
+    line_regex = re.compile(r".*(?:" + "|".join(re.escape(p) for p in patterns) + r").*$")
+    n = 0
+    with open(path) as in_file, open(out_path, 'w') as out_file:
+        for line in in_file:
+            if line_regex.search(line):
+                out_file.write(line)
+                n += 1
+    return n
+
+
+def per_line_in(path, patterns, out_path):
+    # one substring test per pattern per line
+    n = 0
+    with open(path) as in_file, open(out_path, 'w') as out_file:
+        for line in in_file:
+            if any(p in line for p in patterns):
+                out_file.write(line)
+                n += 1
+    return n
+
+
+def engine(path, patterns, out_path):
+    regex = trie_regex([p.encode() for p in patterns])
+    with open(path, 'rb', buffering=0) as in_file, open(out_path, 'wb', buffering=1024 * 1024) as out_file:
+        return filter_stream(regex, in_file, out_file)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="log filter throughput")
+    parser.add_argument('--size-mb', type=int, default=1024)
+    parser.add_argument('--patterns', type=int, default=300)
+    parser.add_argument('--hit-rate', type=float, default=0.001)
+    parser.add_argument('--skip-baselines', action='store_true')
+    parser.add_argument('--dir', default=None, help="where to put the scratch files")
+    args = parser.parse_args()
+
+    rnd = random.Random(7)
+    targets = [random_ip(rnd) for _ in range(args.patterns)]
+    patterns = [f'fwd="{ip}"' for ip in targets]
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        log = os.path.join(tmp, 'access.log')
+        size = build_log(log, args.size_mb, targets, args.hit_rate, rnd)
+        print(f"input: {size / 1e6:,.0f} MB, {len(patterns)} patterns")
+        runs = [("log_filter", engine)]
+        if not args.skip_baselines:
+            runs = [("per-line .* regex", per_line_regex), ("per-line `in` loop", per_line_in)] + runs
+        for label, fn in runs:
+            start = time.perf_counter()
+            n = fn(log, patterns, os.path.join(tmp, 'out.log'))
+            elapsed = time.perf_counter() - start
+            print(f"{label:<20} {n:>10,} lines  {elapsed:8.2f}s  {size / elapsed / 1e6:8.1f} MB/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,19 +1,18 @@
 #!/usr/bin/env python3
 
-import io
-import re
+import os
 import sys
 
+# the conversion itself lives in ../detabify.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from detabify import convert_file
+
 def convert(file_name):
 
     try:
-        # Open new csv file
-        csv = io.open(file_name + ".csv", mode="w", encoding="utf-8")
-        # Open the tsv file
-        with io.open(file_name, mode="r", encoding="utf-8") as tsv:
-            for line in tsv:
-                csv.write(re.sub('\t',',',re.sub('(^|[\t])([^\t]*\,[^\t\n]*)', r'\1"\2"', line)))
-                          
+        # file_name -> file_name.csv
+        convert_file(file_name, file_name + ".csv")
+
     except FileNotFoundError:
         print('File not found')
         sys.exit(1)
@@ -22,9 +21,6 @@ def convert(file_name):
         print('Error:', e)
         sys.exit(1)
 
-    finally:
-        csv.close()
-
 if __name__ == '__main__':
     print('Start converting ...')
     if len(sys.argv) < 2:
@@ -1,23 +1,10 @@
 #!/usr/bin/env python3
 
-import io
-import re
 import os
+from detabify import convert
 
-input = os.getenv('INPUT')
-
-def convert(file_name):
-    # Open csv file
-    file_name="new_mock_data"
-
-    csv = io.open(file_name + ".csv", mode="w", encoding="utf-8")
-
-    # Convert file_name.tsv to file_name.csv
-    with io.open(file_name + ".tsv", mode="r", encoding="utf-8") as tsv:
-        for line in tsv:
-            csv.write(re.sub('\t',',',re.sub('(^|[\t])([^\t]*\,[^\t\n]*)', r'\1"\2"', line)))
-
-    csv.close()
+# file name without the .tsv extension
+input = os.getenv('INPUT', 'new_mock_data')
 
 if __name__ == '__main__':
     print('Start converting ...')
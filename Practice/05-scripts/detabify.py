@@ -1,21 +1,233 @@
 #!/usr/bin/env python3
 
+# Convert delimited text files: TSV -> CSV by default, any delimiter to any other.
+#
+#   python3 detabify.py                                   # new_mock_data.tsv -> new_mock_data.csv
+#   python3 detabify.py trades.tsv -o trades.csv.gz       # gzip out (by extension)
+#   python3 detabify.py dump.psv.gz --in-delimiter '|' --out-delimiter ';' -o dump.csv
+#   python3 detabify.py huge.tsv --workers 0                # one process per CPU
+#
+# Input is read in blocks of whole lines through large file buffers. A block
+# with no quotes, carriage returns or output delimiters in it is converted with
+# one str.replace; anything else goes through the csv module. Either way the
+# output is exactly what csv.writer produces: fields holding the output
+# delimiter, quotes or newlines are quoted the RFC 4180 way.
+
+import argparse
+import collections
+import concurrent.futures
+import csv
+import gzip
 import io
-import re
+import itertools
+import mmap
+import os
+import sys
+
+BUFFER_SIZE = 1024 * 1024
+# characters of input handled per block
+BLOCK_SIZE = 4 * 1024 * 1024
+# bytes of input per worker task in --workers mode
+CHUNK_SIZE = 32 * 1024 * 1024
+
+
+def open_text(path, mode, compresslevel=6):
+    # text stream with newline='' (the csv module handles line endings itself);
+    # .gz paths are (de)compressed on the fly, - is stdin/stdout
+    if path == '-':
+        raw = sys.stdin.buffer if mode == 'r' else sys.stdout.buffer
+        return io.TextIOWrapper(raw, encoding='utf-8', newline='')
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', compresslevel=compresslevel, encoding='utf-8', newline='')
+    return io.open(path, mode, buffering=BUFFER_SIZE, encoding='utf-8', newline='')
+
+
+def convert_stream(src, dst, in_delimiter='\t', out_delimiter=',', in_quoting=True,
+                   lineterminator='\n', strict=False):
+    # copy every record from text stream src to dst; returns the number of records.
+    # in_quoting=False treats " in the input as an ordinary character (plain TSV).
+    # strict=True raises csv.Error on malformed quoting, including a quoted
+    # field still open at the end of src.
+    reader_quoting = csv.QUOTE_MINIMAL if in_quoting else csv.QUOTE_NONE
+    writer = csv.writer(dst, delimiter=out_delimiter, lineterminator=lineterminator)
+    records = 0
+    while True:
+        lines = src.readlines(BLOCK_SIZE)
+        if not lines:
+            return records
+        text = ''.join(lines)
+        if '"' in text or '\r' in text:
+            # quoted fields (possibly running past this block) or CR line ends:
+            # let the csv module parse, reading on until the last record is complete
+            reader = csv.reader(itertools.chain(lines, src), delimiter=in_delimiter,
+                                quoting=reader_quoting, strict=strict)
+            rows = []
+            for row in reader:
+                rows.append(row)
+                if reader.line_num >= len(lines):
+                    break
+            writer.writerows(rows)
+            records += len(rows)
+            continue
+        # nothing in this block needs quoting except fields holding the output
+        # delimiter, so most lines are a plain character swap
+        if not text.endswith('\n'):
+            text += '\n'
+            lines[-1] += '\n'
+        if out_delimiter not in text:
+            dst.write(swap(text, in_delimiter, out_delimiter, lineterminator))
+        else:
+            plain = []
+            for line in lines:
+                if out_delimiter in line:
+                    dst.write(swap(''.join(plain), in_delimiter, out_delimiter, lineterminator))
+                    plain = []
+                    writer.writerow(line[:-1].split(in_delimiter))
+                else:
+                    plain.append(line)
+            dst.write(swap(''.join(plain), in_delimiter, out_delimiter, lineterminator))
+        records += len(lines)
+
+
+def swap(text, in_delimiter, out_delimiter, lineterminator):
+    text = text.replace(in_delimiter, out_delimiter)
+    return text if lineterminator == '\n' else text.replace('\n', lineterminator)
+
+
+def convert_file(in_path, out_path, in_delimiter='\t', out_delimiter=',', in_quoting=True,
+                 lineterminator='\n', compresslevel=6):
+    with open_text(in_path, 'r') as src, open_text(out_path, 'w', compresslevel) as dst:
+        return convert_stream(src, dst, in_delimiter, out_delimiter, in_quoting, lineterminator)
+
+
+def split_points(mm, chunk_size, in_quoting=True):
+    # byte offsets that cut mm into pieces of about chunk_size, each cut just
+    # after a newline. With in_quoting, a cut also needs an even number of "
+    # before it: a newline inside a quoted field has an odd count.
+    size = len(mm)
+    points = [0]
+    quotes = 0
+    counted_to = 0
+    target = chunk_size
+    while target < size:
+        pos = mm.find(b'\n', target)
+        while pos != -1 and in_quoting:
+            quotes += mm[counted_to:pos].count(b'"')
+            counted_to = pos
+            if quotes % 2 == 0:
+                break
+            pos = mm.find(b'\n', pos + 1)
+        if pos == -1 or pos + 1 >= size:
+            break
+        points.append(pos + 1)
+        target = pos + 1 + chunk_size
+    points.append(size)
+    return points
+
+
+def convert_range(in_path, start, end, in_delimiter, out_delimiter, in_quoting, lineterminator,
+                  compresslevel):
+    # worker: convert bytes [start, end) of in_path; returns (records, output bytes)
+    with open(in_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        text = mm[start:end].decode('utf-8')
+    dst = io.StringIO(newline='')
+    # strict, so a range that ends inside a quoted field fails instead of
+    # silently differing from the serial output
+    records = convert_stream(io.StringIO(text, newline=''), dst, in_delimiter, out_delimiter,
+                             in_quoting, lineterminator, strict=True)
+    data = dst.getvalue().encode('utf-8')
+    if compresslevel is not None:
+        data = gzip.compress(data, compresslevel)
+    return records, data
+
+
+def convert_file_parallel(in_path, out_path, workers=None, in_delimiter='\t', out_delimiter=',',
+                          in_quoting=True, lineterminator='\n', compresslevel=6, chunk_size=CHUNK_SIZE):
+    # convert_file across a process pool: the input is mmapped and cut at record
+    # boundaries, each piece is converted by a worker, and the pieces are written
+    # in input order. Plain output is byte-identical to convert_file; .gz output
+    # is one gzip member per piece and decompresses to the same bytes.
+    if in_path == '-' or in_path.endswith('.gz') or os.path.getsize(in_path) == 0:
+        # nothing to mmap: do it serially
+        return convert_file(in_path, out_path, in_delimiter, out_delimiter, in_quoting,
+                            lineterminator, compresslevel)
+    workers = workers or os.cpu_count()
+    with open(in_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        points = split_points(mm, chunk_size, in_quoting)
+    gz = compresslevel if out_path.endswith('.gz') else None
+    raw = sys.stdout.buffer if out_path == '-' else open(out_path, 'wb')
+    records = 0
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            # keep a bounded number of pieces in flight, write them back in order
+            pending = collections.deque()
+            ranges = iter(zip(points[:-1], points[1:]))
+            for start, end in ranges:
+                pending.append(pool.submit(convert_range, in_path, start, end, in_delimiter,
+                                           out_delimiter, in_quoting, lineterminator, gz))
+                if len(pending) >= 2 * workers:
+                    break
+            while pending:
+                n, data = pending.popleft().result()
+                raw.write(data)
+                records += n
+                for start, end in itertools.islice(ranges, 1):
+                    pending.append(pool.submit(convert_range, in_path, start, end, in_delimiter,
+                                               out_delimiter, in_quoting, lineterminator, gz))
+    except csv.Error:
+        # quotes the split points couldn't account for: fall back to one pass
+        if raw is sys.stdout.buffer:
+            raise
+        raw.close()
+        return convert_file(in_path, out_path, in_delimiter, out_delimiter, in_quoting,
+                            lineterminator, compresslevel)
+    finally:
+        if raw is sys.stdout.buffer:
+            raw.flush()
+        elif not raw.closed:
+            raw.close()
+    return records
+
 
 def convert(file_name):
-    # Open csv file
+    # file_name.tsv -> file_name.csv
+    return convert_file(file_name + ".tsv", file_name + ".csv")
+
 
-    csv = io.open(file_name + ".csv", mode="w", encoding="utf-8")
+def delimiter(text):
+    # accept '\t' / 'tab' from the command line as well as a literal character
+    value = {'tab': '\t', '\\t': '\t', 'comma': ',', 'pipe': '|'}.get(text, text)
+    if len(value) != 1:
+        raise argparse.ArgumentTypeError("delimiter must be a single character")
+    return value
 
-    # Convert file_name.tsv to file_name.csv
-    with io.open(file_name + ".tsv", mode="r", encoding="utf-8") as tsv:
-        for line in tsv:
-            csv.write(re.sub('\t',',',re.sub('(^|[\t])([^\t]*\,[^\t\n]*)', r'\1"\2"', line)))
 
-    csv.close()
+def output_path(in_path):
+    stem = in_path[:-3] if in_path.endswith('.gz') else in_path
+    for ext in ('.tsv', '.txt', '.psv'):
+        if stem.endswith(ext):
+            stem = stem[:-len(ext)]
+    return stem + '.csv'
+
 
 if __name__ == '__main__':
-    print('Start converting ...')
-    convert('new_mock_data')
-    print('Converted!')
+    parser = argparse.ArgumentParser(description="convert delimited text (TSV -> CSV by default)")
+    parser.add_argument('input', nargs='?', default='new_mock_data.tsv', help="file to read, .gz ok, - for stdin")
+    parser.add_argument('-o', '--output', help="file to write, .gz ok, - for stdout (default: input with .csv)")
+    parser.add_argument('--in-delimiter', type=delimiter, default='\t')
+    parser.add_argument('--out-delimiter', type=delimiter, default=',')
+    parser.add_argument('--no-in-quoting', action='store_true', help="input never quotes fields")
+    parser.add_argument('--crlf', action='store_true', help="end records with \\r\\n")
+    parser.add_argument('--workers', type=int, default=1, help="processes to convert with (0: one per CPU)")
+    args = parser.parse_args()
+
+    out = args.output or output_path(args.input)
+    lineterminator = '\r\n' if args.crlf else '\n'
+    print('Start converting ...', file=sys.stderr)
+    if args.workers == 1:
+        n = convert_file(args.input, out, args.in_delimiter, args.out_delimiter,
+                         not args.no_in_quoting, lineterminator)
+    else:
+        n = convert_file_parallel(args.input, out, args.workers or None, args.in_delimiter,
+                                  args.out_delimiter, not args.no_in_quoting, lineterminator)
+    print(f'Converted {n} records to {out}', file=sys.stderr)
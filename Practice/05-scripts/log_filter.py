@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+
+# Copy the log lines that contain any of a set of literal strings.
+#
+#   python3 log_filter.py access.log -p 'fwd="12.34.56.78"' -o parsed_lines.log
+#   python3 log_filter.py access.log --patterns-file bad_ips.txt --rotated
+#   python3 log_filter.py access.log --patterns-file bad_ips.txt --follow
+#
+# All the patterns are compiled into one regex shaped like a trie (shared
+# prefixes are matched once), so hundreds of IPs or tokens cost about the same
+# as one. Input is read as bytes in large blocks; the regex jumps from hit to
+# hit inside a block instead of visiting every line. Matching lines are
+# collected per block and written through a large output buffer.
+#
+# --rotated also reads the rotated copies (access.log.3.gz, access.log.2.gz,
+# access.log.1, ...) oldest first. --follow keeps reading the last file as it
+# grows, like tail -f, and reopens it when it is rotated or truncated.
+
+import argparse
+import gzip
+import os
+import re
+import sys
+import time
+
+BLOCK_SIZE = 4 * 1024 * 1024
+OUTPUT_BUFFER = 1024 * 1024
+FOLLOW_INTERVAL = 0.5
+
+
+def trie_regex(patterns, ignore_case=False):
+    # one regex matching any of the literal byte strings in `patterns`
+    trie = {}
+    for pattern in patterns:
+        if not pattern:
+            raise ValueError("empty pattern")
+        node = trie
+        for byte in pattern:
+            node = node.setdefault(byte, {})
+        node[None] = True
+    return re.compile(_trie_pattern(trie), re.IGNORECASE if ignore_case else 0)
+
+
+def _trie_pattern(node):
+    ends_here = None in node
+    branches = []
+    single = []
+    for byte in sorted(k for k in node if k is not None):
+        tail = _trie_pattern(node[byte])
+        if tail:
+            branches.append(re.escape(bytes([byte])) + tail)
+        else:
+            single.append(byte)
+    if single:
+        # bytes that end a pattern collapse into one character class
+        if len(single) == 1:
+            branches.append(re.escape(bytes(single)))
+        else:
+            branches.append(b'[' + b''.join(re.escape(bytes([b])) for b in single) + b']')
+    if not branches:
+        return b''
+    if len(branches) == 1 and not ends_here:
+        return branches[0]
+    return b'(?:' + b'|'.join(branches) + b')' + (b'?' if ends_here else b'')
+
+
+def matching_lines(regex, block):
+    # the complete lines of `block` that contain a match, as a list of bytes
+    hits = []
+    search = regex.search
+    pos = 0
+    while True:
+        m = search(block, pos)
+        if m is None:
+            return hits
+        start = block.rfind(b'\n', 0, m.start()) + 1
+        end = block.find(b'\n', m.end())
+        end = len(block) if end == -1 else end + 1
+        hits.append(block[start:end])
+        pos = end
+
+
+def open_input(path):
+    if path == '-':
+        return sys.stdin.buffer
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb', buffering=0)
+
+
+def filter_stream(regex, f, out, block_size=BLOCK_SIZE):
+    # copy matching lines from binary stream f to out; returns (lines matched, bytes read)
+    matched = 0
+    read = 0
+    rest = b''
+    while True:
+        chunk = f.read(block_size)
+        if not chunk:
+            break
+        read += len(chunk)
+        # only search up to the last newline; the partial line waits for the next block
+        cut = chunk.rfind(b'\n') + 1
+        if cut == 0:
+            rest += chunk
+            continue
+        block = rest + chunk[:cut] if rest else chunk[:cut]
+        rest = chunk[cut:]
+        hits = matching_lines(regex, block)
+        if hits:
+            out.write(b''.join(hits))
+            matched += len(hits)
+    if rest:
+        hits = matching_lines(regex, rest)
+        if hits:
+            # keep the output line-terminated even when the input isn't
+            out.write(hits[0] if hits[0].endswith(b'\n') else hits[0] + b'\n')
+            matched += 1
+    return matched, read
+
+
+def rotated_inputs(path):
+    # path.N and path.N.gz copies, highest N (oldest) first, then path itself
+    directory = os.path.dirname(path) or '.'
+    base = os.path.basename(path)
+    rotation = re.compile(re.escape(base) + r'\.(\d+)(\.gz)?$')
+    copies = []
+    for name in os.listdir(directory):
+        m = rotation.match(name)
+        if m:
+            copies.append((int(m.group(1)), os.path.join(directory, name)))
+    return [p for _, p in sorted(copies, reverse=True)] + [path]
+
+
+def follow(regex, path, out, from_start=False, interval=FOLLOW_INTERVAL, block_size=BLOCK_SIZE):
+    # tail -f: keep filtering what gets appended to path (after what's already
+    # there, unless from_start); only complete lines are matched
+    f = open(path, 'rb', buffering=0)
+    if not from_start:
+        f.seek(0, os.SEEK_END)
+    rest = b''
+    try:
+        while True:
+            chunk = f.read(block_size)
+            if chunk:
+                cut = chunk.rfind(b'\n') + 1
+                if cut == 0:
+                    rest += chunk
+                    continue
+                block = rest + chunk[:cut]
+                rest = chunk[cut:]
+                hits = matching_lines(regex, block)
+                if hits:
+                    out.write(b''.join(hits))
+                    out.flush()
+                continue
+            time.sleep(interval)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                # rotated away and not recreated yet
+                continue
+            if st.st_ino != os.fstat(f.fileno()).st_ino or st.st_size < f.tell():
+                # rotated or truncated: read the new file from the top
+                f.close()
+                f = open(path, 'rb', buffering=0)
+                rest = b''
+    finally:
+        f.close()
+
+
+def read_patterns(path):
+    with open(path, 'rb') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith(b'#')]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="copy log lines containing any of many literal strings")
+    parser.add_argument('inputs', nargs='+', help="log files (.gz ok), - for stdin")
+    parser.add_argument('-p', '--pattern', action='append', default=[], help="literal string to match (repeatable)")
+    parser.add_argument('--patterns-file', help="file with one literal string per line")
+    parser.add_argument('-i', '--ignore-case', action='store_true')
+    parser.add_argument('--rotated', action='store_true', help="also read path.N / path.N.gz copies, oldest first")
+    parser.add_argument('-f', '--follow', action='store_true', help="keep reading the last input as it grows")
+    parser.add_argument('-o', '--output', default='-', help="file to write, - for stdout")
+    args = parser.parse_args()
+
+    patterns = [p.encode('utf-8') for p in args.pattern]
+    if args.patterns_file:
+        patterns += read_patterns(args.patterns_file)
+    if not patterns:
+        parser.error("give at least one --pattern or a --patterns-file")
+    regex = trie_regex(patterns, args.ignore_case)
+
+    paths = []
+    for path in args.inputs:
+        paths += rotated_inputs(path) if args.rotated and path != '-' else [path]
+
+    out = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb', buffering=OUTPUT_BUFFER)
+    matched = 0
+    read = 0
+    start = time.perf_counter()
+    if args.follow and paths[-1] == '-':
+        parser.error("--follow needs a file")
+    try:
+        # with --follow the last file is read by follow() so nothing appended meanwhile is missed
+        for path in paths[:-1] if args.follow else paths:
+            try:
+                f = open_input(path)
+            except FileNotFoundError:
+                print(f"{path}: not found", file=sys.stderr)
+                sys.exit(1)
+            with f:
+                n, size = filter_stream(regex, f, out)
+            matched += n
+            read += size
+        elapsed = time.perf_counter() - start
+        print(f"{matched:,} matching lines from {read / 1e6:,.1f} MB in {elapsed:.2f}s", file=sys.stderr)
+        if args.follow:
+            out.flush()
+            follow(regex, paths[-1], out, from_start=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        out.flush()
+        if out is not sys.stdout.buffer:
+            out.close()
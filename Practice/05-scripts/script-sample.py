@@ -1,33 +1,34 @@
-1. shebang / executable
-2. error out / error codes
-3. input parameters
-4. conditional logic
-5. full paths
-6. logging
-7. comments!
+#!/usr/bin/env python3
+
+# 1. shebang / executable
+# 2. error out / error codes
+# 3. input parameters
+# 4. conditional logic
+# 5. full paths
+# 6. logging
+# 7. comments!
 
 
 #####
 
 import os
-import re
+import sys
+from log_filter import filter_stream, trie_regex
 
-# Regex used to match relevant loglines (in this case, a specific IP address)
-line_regex = re.compile(r".*fwd=\"12.34.56.78\".*$")
+# Literal strings that make a logline relevant (in this case, a specific IP address).
+# Add as many as you like: they are all matched in a single pass.
+patterns = [b'fwd="12.34.56.78"']
+line_regex = trie_regex(patterns)
 
-# Output file, where the matched loglines will be copied to
+# Output file, where the matched loglines will be copied to (opened once, overwritten)
 output_filename = os.path.normpath("parsed_lines.log")
-# Overwrites the file, ensure we're starting out with a blank file
-with open(output_filename, "w") as out_file:
-    out_file.write("")
-
-# Open output file in 'append' mode
-with open(output_filename, "a") as out_file:
-    # Open input file in 'read' mode
-    with open("../input/test-log/test_log.log", "r") as in_file:
-        # Loop over each log line
-        for line in in_file:
-            # If log line matches our regex, print to console, and output file
-            if (line_regex.search(line)):
-                print(line)
-                out_file.write(line)
+input_filename = os.path.normpath("../input/test-log/test_log.log")
+
+try:
+    with open(input_filename, "rb") as in_file, open(output_filename, "wb", buffering=1024 * 1024) as out_file:
+        matched, _ = filter_stream(line_regex, in_file, out_file)
+except FileNotFoundError as e:
+    print("File not found:", e.filename, file=sys.stderr)
+    sys.exit(1)
+
+print(f"{matched} matching lines written to {output_filename}")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+# Load a scaled-up mock_data file into a local MySQL every way bulk_load.py can,
+# plus the old one-row-per-execute-and-commit approach from data_select.py.
+# Needs DBHOST/DBUSER/DBPASS pointing at a server you can write to:
+#
+#   python3 benchmarks/bulk_load.py --rows 10000000 --format csv
+#
+# The per-row baseline only loads --baseline-rows rows; its rows/s is what matters.
+
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import bulk_load  # noqa: E402
+
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '01-data', 'mock_data.csv')
+TABLE = 'mock_data_bench'
+CREATE = (f"CREATE TABLE IF NOT EXISTS {TABLE} (id INT PRIMARY KEY, first_name VARCHAR(50), "
+          "last_name VARCHAR(50), email VARCHAR(50), ip_address VARCHAR(20), dob VARCHAR(10))")
+
+
+def scale(path, rows, fmt):
+    # cycle the 100 sample rows, renumbering ids, into a file of `rows` rows
+    with open(SOURCE, newline='') as f:
+        reader = csv.reader(f)
+        columns = next(reader)
+        sample = list(reader)
+    rnd = random.Random(0)
+    with open(path, 'w', newline='') as out:
+        if fmt in ('csv', 'tsv'):
+            w = csv.writer(out, delimiter=',' if fmt == 'csv' else '\t', lineterminator='\n')
+            w.writerow(columns)
+            for i in range(rows):
+                w.writerow([i + 1] + rnd.choice(sample)[1:])
+        elif fmt == 'json':
+            out.write('[')
+            for i in range(rows):
+                row = dict(zip(columns, [i + 1] + rnd.choice(sample)[1:]))
+                out.write((',\n' if i else '') + json.dumps(row))
+            out.write(']\n')
+        else:
+            cols = ', '.join(columns)
+            for i in range(rows):
+                values = ', '.join(["%d" % (i + 1)] + ["'%s'" % v.replace("'", "''")
+                                                        for v in rnd.choice(sample)[1:]])
+                out.write(f"insert into MOCK_DATA ({cols}) values ({values});\n")
+
+
+def reset():
+    db = bulk_load.connect()
+    c = db.cursor()
+    c.execute(CREATE)
+    c.execute(f"TRUNCATE TABLE {TABLE}")
+    db.commit()
+    c.close()
+    db.close()
+
+
+def per_row(path, limit):
+    # data_select.py style: execute + commit for every row
+    rows = bulk_load.read_rows(path)
+    statement = bulk_load.insert_statement(TABLE, next(rows))
+    db = bulk_load.connect()
+    c = db.cursor()
+    n = 0
+    for row in rows:
+        c.execute(statement, row)
+        db.commit()
+        n += 1
+        if n >= limit:
+            break
+    c.close()
+    db.close()
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="bulk loader benchmark")
+    parser.add_argument('--rows', type=int, default=10000000)
+    parser.add_argument('--format', choices=['csv', 'tsv', 'json', 'sql'], default='csv')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--baseline-rows', type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"mock_data.{args.format}")
+        t = time.perf_counter()
+        scale(path, args.rows, args.format)
+        print(f"wrote {args.rows:,} rows ({os.path.getsize(path) / 1e6:,.0f} MB) "
+              f"in {time.perf_counter() - t:.1f}s")
+
+        runs = [("per-row commit", lambda: per_row(path, args.baseline_rows))]
+        for workers in args.workers:
+            runs.append((f"bulk x{workers} workers",
+                         lambda w=workers: bulk_load.bulk_insert(path, TABLE, workers=w)))
+        if args.format in ('csv', 'tsv'):
+            runs.append(("LOAD DATA INFILE", lambda: bulk_load.load_data_infile(path, TABLE)))
+
+        for label, run in runs:
+            reset()
+            t = time.perf_counter()
+            n = run()
+            elapsed = time.perf_counter() - t
+            print(f"{label:<20} {n:>12,} rows  {n / elapsed:12,.0f} rows/s  ({elapsed:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
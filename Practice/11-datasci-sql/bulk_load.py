@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+
+# Bulk-load mock_data style files into MySQL.
+#
+#   python3 bulk_load.py ../01-data/mock_data.csv --table mock_data
+#   python3 bulk_load.py ../01-data/mock_data.json --table mock_data --workers 4 --txn-rows 50000
+#   python3 bulk_load.py ../01-data/mock_data.tsv --table mock_data --load-data
+#
+# Files are streamed, never read whole, by the readers in ../01-data/formats.py:
+# CSV/TSV row by row, JSON arrays object by object, XML record by record and
+# .sql files statement by statement. Rows are grouped into
+# transactions of --txn-rows rows, each written as multi-row INSERTs of
+# --chunk-rows rows and committed once, by --workers threads that each hold
+# their own connection. --load-data hands CSV/TSV files straight to the
+# server with LOAD DATA LOCAL INFILE, which is the fastest path MySQL has.
+
+import argparse
+import csv
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import MySQLdb
+
+# streaming readers for every mock_data format live in ../01-data/formats.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '01-data'))
+from formats import read_rows  # noqa: E402
+
+DBHOST = os.environ.get('DBHOST')
+DBUSER = os.environ.get('DBUSER')
+DBPASS = os.environ.get('DBPASS')
+DB = "nem2p"
+
+IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def connect(**extra):
+    return MySQLdb.connect(host=DBHOST, user=DBUSER, passwd=DBPASS, db=DB, **extra)
+
+
+def quote_identifier(name):
+    if not IDENTIFIER.match(name):
+        raise ValueError(f"not a plain SQL identifier: {name!r}")
+    return f"`{name}`"
+
+
+# --- writers ---
+
+def insert_statement(table, columns):
+    return "INSERT INTO {} ({}) VALUES ({})".format(
+        quote_identifier(table), ",".join(map(quote_identifier, columns)),
+        ",".join(["%s"] * len(columns)))
+
+
+class BulkLoadError(Exception):
+    # the file couldn't be read to the end or some transactions failed;
+    # `rows` were still committed
+    def __init__(self, rows, errors):
+        super().__init__(f"{len(errors)} error(s), {rows:,} rows committed")
+        self.rows = rows
+        self.errors = errors
+
+
+def writer(jobs, statement, chunk_rows, counts, errors):
+    # one connection per worker; each job is one transaction.
+    # every failure is recorded in `errors`, none ends the thread silently
+    try:
+        db = connect()
+    except Exception as e:
+        errors.append(e)
+        return
+    c = db.cursor()
+    try:
+        while True:
+            rows = jobs.get()
+            if rows is None:
+                return
+            try:
+                for i in range(0, len(rows), chunk_rows):
+                    # MySQLdb turns this into one multi-row INSERT per chunk
+                    c.executemany(statement, rows[i:i + chunk_rows])
+                db.commit()
+                with counts['lock']:
+                    counts['rows'] += len(rows)
+            except Exception as e:
+                errors.append(e)
+                try:
+                    db.rollback()
+                except MySQLdb.Error:
+                    pass
+    finally:
+        c.close()
+        db.close()
+
+
+def put_job(jobs, job, threads):
+    # put on the bounded queue, unless every writer has died; returns False then
+    while True:
+        try:
+            jobs.put(job, timeout=0.5)
+            return True
+        except queue.Full:
+            if not any(t.is_alive() for t in threads):
+                return False
+
+
+def bulk_insert(path, table, workers=2, txn_rows=20000, chunk_rows=1000):
+    rows_iter = read_rows(path)
+    columns = next(rows_iter)
+    statement = insert_statement(table, columns)
+    # bounded so the reader can't run far ahead of the writers
+    jobs = queue.Queue(maxsize=workers * 2)
+    counts = {'rows': 0, 'lock': threading.Lock()}
+    errors = []
+    threads = [threading.Thread(target=writer, args=(jobs, statement, chunk_rows, counts, errors))
+               for _ in range(workers)]
+    for t in threads:
+        t.start()
+    batch = []
+    alive = True
+    try:
+        for row in rows_iter:
+            batch.append(row)
+            if len(batch) >= txn_rows:
+                alive = put_job(jobs, batch, threads)
+                if not alive:
+                    break
+                batch = []
+        if batch and alive:
+            alive = put_job(jobs, batch, threads)
+    except Exception as e:
+        # a malformed file: stop feeding, but let the writers finish what they have
+        errors.append(e)
+    finally:
+        # always stop the writers, or the non-daemon threads keep the process alive
+        for _ in threads:
+            if not put_job(jobs, None, threads):
+                break
+        for t in threads:
+            t.join()
+    if not alive and not errors:
+        errors.append(RuntimeError("every writer thread stopped"))
+    if errors:
+        raise BulkLoadError(counts['rows'], errors)
+    return counts['rows']
+
+
+def load_data_infile(path, table):
+    # CSV/TSV only: the server parses the file, no per-row Python work at all
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in ('.csv', '.tsv'):
+        raise ValueError("--load-data only works with .csv and .tsv files")
+    delimiter = ',' if ext == '.csv' else '\t'
+    with open(path, newline='') as f:
+        columns = next(csv.reader(f, delimiter=delimiter))
+    query = ("LOAD DATA LOCAL INFILE %s INTO TABLE {} "
+             "FIELDS TERMINATED BY %s OPTIONALLY ENCLOSED BY '\"' "
+             "LINES TERMINATED BY '\\n' IGNORE 1 LINES ({})").format(
+        quote_identifier(table), ",".join(map(quote_identifier, columns)))
+    db = connect(local_infile=1)
+    c = db.cursor()
+    try:
+        rows = c.execute(query, (os.path.abspath(path), delimiter))
+        db.commit()
+        return rows
+    finally:
+        c.close()
+        db.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="bulk-load CSV/TSV/JSON/SQL files into MySQL")
+    parser.add_argument('path')
+    parser.add_argument('--table', default='mock_data')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--txn-rows', type=int, default=20000, help="rows per transaction")
+    parser.add_argument('--chunk-rows', type=int, default=1000, help="rows per INSERT statement")
+    parser.add_argument('--load-data', action='store_true', help="use LOAD DATA LOCAL INFILE (CSV/TSV)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.load_data:
+        rows = load_data_infile(args.path, args.table)
+    else:
+        try:
+            rows = bulk_insert(args.path, args.table, args.workers, args.txn_rows, args.chunk_rows)
+        except BulkLoadError as e:
+            for error in e.errors:
+                print("Error: ", str(error))
+            print(f"failed: {e}")
+            sys.exit(1)
+    elapsed = time.perf_counter() - start
+    print(f"loaded {rows:,} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
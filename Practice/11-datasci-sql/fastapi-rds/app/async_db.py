@@ -0,0 +1,150 @@
+import asyncio
+import concurrent.futures
+import os
+import MySQLdb
+from database import DB_NAME, HOST, USER, PASS, POOL_SIZE, PoolTimeout, pool
+from writes import INSERT_TRACK, INSERT_CHUNK_SIZE, ROLLUPS, TRACK_COLUMNS, insert_tracks
+from rollups import rollup_updates
+
+# how async handlers reach the database:
+#   aiomysql - native async driver and pool, nothing blocks the event loop
+#   thread   - the sync MySQLdb pool, run on a bounded thread pool
+#   inline   - the sync MySQLdb pool called directly (blocks the loop; baseline for benchmarks)
+# defaults to aiomysql when it is installed, otherwise thread
+DB_ASYNC = os.environ.get('DB_ASYNC')
+
+
+class DatabaseError(Exception):
+    # raised by every backend so handlers don't depend on the driver
+    pass
+
+
+def _fetch_all(query, params):
+    with pool.connection() as conn:
+        c = conn.cursor()
+        try:
+            c.execute(query, params)
+            headers = [x[0] for x in c.description]
+            return headers, c.fetchall()
+        finally:
+            c.close()
+
+
+def _insert(rows):
+    with pool.connection() as conn:
+        return insert_tracks(conn, rows)
+
+
+class InlineBackend:
+    name = "inline"
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def _call(self, fn, *args):
+        try:
+            return fn(*args)
+        except (MySQLdb.Error, PoolTimeout) as e:
+            # PoolTimeout: streams or the write-behind thread hold every connection
+            raise DatabaseError(str(e)) from e
+
+    async def fetch_all(self, query, params=()):
+        return await self._call(_fetch_all, query, params)
+
+    async def insert_tracks(self, rows):
+        return await self._call(_insert, rows)
+
+
+class ThreadBackend(InlineBackend):
+    name = "thread"
+
+    def __init__(self, max_workers=POOL_SIZE):
+        # no more threads than pooled connections, so workers never wait on the pool
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="db")
+
+    async def close(self):
+        self.executor.shutdown(wait=True)
+
+    async def _call(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.executor, fn, *args)
+        except (MySQLdb.Error, PoolTimeout) as e:
+            raise DatabaseError(str(e)) from e
+
+
+class AioMySQLBackend:
+    name = "aiomysql"
+
+    def __init__(self, maxsize=POOL_SIZE):
+        self.maxsize = maxsize
+        self.pool = None
+
+    async def start(self):
+        import aiomysql
+        self.pool = await aiomysql.create_pool(
+            host=HOST, user=USER, password=PASS, db=DB_NAME,
+            minsize=1, maxsize=self.maxsize, pool_recycle=3600,
+            # SELECTs must not leave a transaction open: aiomysql closes, rather
+            # than reuses, any connection released mid-transaction
+            autocommit=True)
+
+    async def close(self):
+        self.pool.close()
+        await self.pool.wait_closed()
+
+    async def fetch_all(self, query, params=()):
+        import pymysql
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.cursor() as c:
+                    await c.execute(query, params)
+                    headers = [x[0] for x in c.description]
+                    return headers, await c.fetchall()
+        except pymysql.MySQLError as e:
+            raise DatabaseError(str(e)) from e
+
+    async def insert_tracks(self, rows):
+        import pymysql
+        try:
+            async with self.pool.acquire() as conn:
+                # autocommit is on for the pool, so the inserts and rollup
+                # upserts are grouped into one transaction explicitly
+                await conn.begin()
+                try:
+                    async with conn.cursor() as c:
+                        for i in range(0, len(rows), INSERT_CHUNK_SIZE):
+                            await c.executemany(INSERT_TRACK, rows[i:i + INSERT_CHUNK_SIZE])
+                        if ROLLUPS:
+                            for statement, params in rollup_updates(rows, TRACK_COLUMNS):
+                                await c.executemany(statement, params)
+                    await conn.commit()
+                except BaseException:
+                    await conn.rollback()
+                    raise
+            return len(rows)
+        except pymysql.MySQLError as e:
+            raise DatabaseError(str(e)) from e
+
+    def metrics(self):
+        return {"size": self.pool.size, "free": self.pool.freesize, "maxsize": self.pool.maxsize}
+
+
+def make_backend(kind=DB_ASYNC):
+    if kind is None:
+        try:
+            import aiomysql  # noqa: F401
+            kind = "aiomysql"
+        except ImportError:
+            kind = "thread"
+    if kind == "aiomysql":
+        return AioMySQLBackend()
+    if kind == "thread":
+        return ThreadBackend()
+    if kind == "inline":
+        return InlineBackend()
+    raise ValueError(f"unknown DB_ASYNC backend: {kind}")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+# Rebuild the hourly/daily rollup tables from the raw tracking rows for a
+# date range, one chunk of days per transaction:
+#
+#   python3 backfill_rollups.py 2020-01-01 2021-01-01 --chunk-days 7
+#
+# Each chunk deletes its rollup rows and re-aggregates them in SQL, so it is
+# safe to re-run. Pause writes for the range while it runs, or inserts that
+# land mid-chunk may be counted twice.
+
+import argparse
+import datetime
+from database import pool
+from rollups import ROLLUP_COLUMNS, TABLES
+
+BUCKET_EXPR = {
+    "hour": "DATE_FORMAT(created_on, '%%Y-%%m-%%d %%H:00:00')",
+    "day": "DATE(created_on)",
+}
+
+REBUILD = """INSERT INTO {table} ({cols})
+SELECT {bucket} AS bucket, COUNT(*),
+    SUM(telem_1), MIN(telem_1), MAX(telem_1),
+    SUM(telem_2), MIN(telem_2), MAX(telem_2),
+    MIN(longitude + 0), MAX(longitude + 0), MIN(latitude + 0), MAX(latitude + 0)
+FROM tracking
+WHERE created_on >= %s AND created_on < %s
+GROUP BY bucket;"""
+
+
+def backfill(start, end, chunk_days=1):
+    chunk = datetime.timedelta(days=chunk_days)
+    with pool.connection() as db:
+        c = db.cursor()
+        lo = start
+        while lo < end:
+            hi = min(lo + chunk, end)
+            for granularity, table in TABLES.items():
+                c.execute(f"DELETE FROM {table} WHERE bucket >= %s AND bucket < %s;", (lo, hi))
+                c.execute(REBUILD.format(table=table, cols=",".join(ROLLUP_COLUMNS),
+                                         bucket=BUCKET_EXPR[granularity]), (lo, hi))
+            db.commit()
+            print(f"rebuilt {lo:%Y-%m-%d} .. {hi:%Y-%m-%d}")
+            lo = hi
+        c.close()
+
+
+def parse_date(value):
+    return datetime.datetime.strptime(value, "%Y-%m-%d")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="rebuild tracking rollups for a date range")
+    parser.add_argument('start', type=parse_date, help="first day, YYYY-MM-DD")
+    parser.add_argument('end', type=parse_date, help="day after the last day, YYYY-MM-DD")
+    parser.add_argument('--chunk-days', type=int, default=1)
+    args = parser.parse_args()
+    backfill(args.start, args.end, args.chunk_days)
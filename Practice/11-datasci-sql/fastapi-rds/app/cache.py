@@ -0,0 +1,166 @@
+import collections
+import os
+import threading
+import time
+
+# cached month responses expire after this many seconds even without a write
+CACHE_TTL = float(os.environ.get('CACHE_TTL', 300))
+# cap on the total size of cached response bodies held in this process
+CACHE_MAX_BYTES = int(os.environ.get('CACHE_MAX_BYTES', 64 * 1024 * 1024))
+# set to a redis:// URL to share the cache between uvicorn workers
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+
+
+def month_key(year, month):
+    return f"tracking:{year:04}-{month:02}"
+
+
+def month_of(created_on):
+    # created_on datetime (as writes.track_row parses it) -> (2020, 8)
+    return created_on.year, created_on.month
+
+
+class ResponseCache:
+    """In-process LRU + TTL cache of encoded response bodies.
+
+    Each key carries a generation number that `invalidate()` bumps. A reader
+    grabs the generation before querying and passes it back to `set()`, so a
+    response computed before a concurrent write never gets cached after it.
+    """
+
+    def __init__(self, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()  # key -> (expires, body)
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def generation(self, key):
+        with self._lock:
+            return self._generations.get(key, 0)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def set(self, key, body, generation=None):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generations.get(key, 0):
+                # a write landed while this response was being built
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, body)
+            self.bytes += len(body)
+            while self.bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            if key in self._entries:
+                self._remove(key)
+            self.invalidations += 1
+
+    def _remove(self, key):
+        _, body = self._entries.pop(key)
+        self.bytes -= len(body)
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+class RedisResponseCache:
+    """Same interface, backed by Redis (or any Redis-compatible server such as
+    a local KeyDB/Valkey) so every worker process sees the same entries.
+
+    Size limits and LRU eviction are left to the server's `maxmemory` and
+    `maxmemory-policy allkeys-lru` settings. Generations live in Redis too.
+    """
+
+    def __init__(self, url, ttl=CACHE_TTL):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def generation(self, key):
+        return int(self.client.get(key + ":gen") or 0)
+
+    def get(self, key):
+        body = self.client.get(key)
+        if body is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return body
+
+    def set(self, key, body, generation=None):
+        import redis
+        with self.client.pipeline() as pipe:
+            try:
+                # only write if nobody invalidated the key since `generation` was read
+                pipe.watch(key + ":gen")
+                if generation is not None and int(pipe.get(key + ":gen") or 0) != generation:
+                    return
+                pipe.multi()
+                pipe.setex(key, int(self.ttl), body)
+                pipe.execute()
+            except redis.WatchError:
+                pass
+
+    def invalidate(self, key):
+        with self.client.pipeline() as pipe:
+            pipe.incr(key + ":gen")
+            pipe.delete(key)
+            pipe.execute()
+        self.invalidations += 1
+
+    def metrics(self):
+        lookups = self.hits + self.misses
+        info = self.client.info("stats")
+        return {
+            "backend": "redis",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "evictions": info.get("evicted_keys", 0),
+        }
+
+
+def make_cache():
+    if CACHE_REDIS_URL:
+        return RedisResponseCache(CACHE_REDIS_URL)
+    return ResponseCache()
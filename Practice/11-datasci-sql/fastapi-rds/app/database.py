@@ -1,4 +1,7 @@
 import os
+import queue
+import threading
+import time
 import MySQLdb
 
 DB_NAME = 'ds3002'
@@ -6,9 +9,148 @@ HOST = 'ds3002-rds.cqee4iwdcaph.us-east-1.rds.amazonaws.com'
 USER = 'ds3002'
 PASS = os.environ.get('RDS_PASS')
 
-db = MySQLdb.connect(
+# size the pool to roughly the number of worker threads serving requests
+POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+# how long a request will wait for a free connection before giving up
+POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 5))
+# only ping a connection on checkout if it has sat idle this many seconds
+POOL_PING_AFTER = float(os.environ.get('DB_POOL_PING_AFTER', 30))
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """A bounded, thread-safe pool of MySQLdb connections.
+
+    Connections are created lazily up to `size`, health-checked with a
+    ping when they come out of the pool, and replaced if they have gone stale.
+    """
+
+    def __init__(self, size=POOL_SIZE, timeout=POOL_TIMEOUT, ping_after=POOL_PING_AFTER, **connect_args):
+        self.size = size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.connect_args = connect_args
+        # idle connections, stored as (connection, time it was returned)
+        self._idle = queue.LifoQueue()
+        # caps the number of connections that exist at once
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reconnects = 0
+        self.in_use = 0
+        self.checkouts = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+
+    def _connect(self):
+        conn = MySQLdb.connect(**self.connect_args)
+        with self._lock:
+            self.created += 1
+        return conn
+
+    def _healthy(self, conn, returned_at):
+        if time.monotonic() - returned_at < self.ping_after:
+            return True
+        try:
+            conn.ping()
+            return True
+        except MySQLdb.Error:
+            return False
+
+    def acquire(self):
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(f"no database connection free after {self.timeout}s")
+        try:
+            try:
+                conn, returned_at = self._idle.get_nowait()
+                if not self._healthy(conn, returned_at):
+                    # stale connection: throw it away and open a fresh one
+                    self._discard(conn)
+                    conn = self._connect()
+                    with self._lock:
+                        self.reconnects += 1
+            except queue.Empty:
+                conn = self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+        waited = time.monotonic() - start
+        with self._lock:
+            self.in_use += 1
+            self.checkouts += 1
+            self.wait_time += waited
+            self.max_wait = max(self.max_wait, waited)
+        return conn
+
+    def release(self, conn, broken=False):
+        if broken:
+            self._discard(conn)
+        else:
+            try:
+                # never hand an open transaction to the next request
+                conn.rollback()
+                self._idle.put((conn, time.monotonic()))
+            except MySQLdb.Error:
+                self._discard(conn)
+        with self._lock:
+            self.in_use -= 1
+        self._slots.release()
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except MySQLdb.Error:
+            pass
+
+    def connection(self):
+        return _PooledConnection(self)
+
+    def close(self):
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "created": self.created,
+                "reconnects": self.reconnects,
+                "in_use": self.in_use,
+                "idle": self._idle.qsize(),
+                "checkouts": self.checkouts,
+                "avg_wait_ms": round(1000 * self.wait_time / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(1000 * self.max_wait, 3),
+            }
+
+
+class _PooledConnection:
+    # `with pool.connection() as conn:` checks out a connection and always returns it
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.conn = None
+
+    def __enter__(self):
+        self.conn = self.pool.acquire()
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        broken = isinstance(exc, MySQLdb.OperationalError)
+        self.pool.release(self.conn, broken=broken)
+        return False
+
+
+pool = ConnectionPool(
     host=HOST,
     user=USER,
     passwd=PASS,
-    db="ds3002"
-)
\ No newline at end of file
+    db=DB_NAME
+)
@@ -1,24 +1,108 @@
 #!/usr/bin/env python3
 
-from fastapi import FastAPI, HTTPException
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 import os
 from database import *
-import json
-import decimal
-from decimal import Decimal
 import datetime
+import MySQLdb.cursors
+import asyncio
+from typing import List, Optional
+from writes import TRACK_COLUMNS, WriteBehindBuffer, track_row
+from cache import make_cache, month_key, month_of
+from async_db import DatabaseError, make_backend
+from rollups import TABLES, summarize, summary_query
+import spatial
+from serialize import column_names, encode_rows, row_encoder
 
-def Decoder(o):
-    if isinstance(o, datetime.datetime):
-        return str(o)
-    elif isinstance(o, decimal.Decimal):
-        return o.__str__()
+# columns every tracking response returns; an explicit list keeps internal
+# columns such as the generated cell (migration 003) out of the API
+SELECT_COLUMNS = ",".join(TRACK_COLUMNS)
+
+def month_range(year, month):
+    # first instant of the month and of the month after it
+    if not 1 <= month <= 12:
+        raise HTTPException(status_code=400, detail="month must be 1-12")
+    try:
+        start = datetime.datetime(year, month, 1)
+        if month == 12:
+            end = datetime.datetime(year + 1, 1, 1)
+        else:
+            end = datetime.datetime(year, month + 1, 1)
+    except ValueError:
+        # year 0, or 9999-12 whose end would be in year 10000
+        raise HTTPException(status_code=400, detail="year must be 1-9999 (9999 up to month 11)")
+    return start, end
+
+# rows fetched from the server-side cursor per chunk of streamed output
+STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', 1000))
+
+def stream_rows(query, params, fmt="json", batch_size=STREAM_BATCH_SIZE):
+    # Unbuffered server-side cursor: rows stay on the server until fetched,
+    # so memory holds one batch at a time no matter how big the month is.
+    # The generator checks out its own connection because it keeps running
+    # after the request handler has returned.
+    conn = pool.acquire()
+    finished = False
+    try:
+        c = conn.cursor(MySQLdb.cursors.SSCursor)
+        c.execute(query, params)
+        encode = row_encoder(column_names(c.description))
+        if fmt == "json":
+            yield b"["
+        first = True
+        while True:
+            rows = c.fetchmany(batch_size)
+            if not rows:
+                break
+            encoded = [encode(row) for row in rows]
+            if fmt == "ndjson":
+                yield ("\n".join(encoded) + "\n").encode()
+            else:
+                yield (("" if first else ",") + ",".join(encoded)).encode()
+            first = False
+        if fmt == "json":
+            yield b"]"
+        c.close()
+        finished = True
+    finally:
+        # A client that disconnects mid-stream leaves the rest of the result
+        # on the server; closing the SSCursor would read it all just to throw
+        # it away while holding a pooled connection. Drop the connection instead.
+        pool.release(conn, broken=not finished)
+
+# optional write-behind buffering for POST /tracking/
+WRITE_BEHIND = os.environ.get('WRITE_BEHIND', '0') == '1'
+# wait for the batch commit before answering (durable ack) unless ?durable=false
+WRITE_BEHIND_DURABLE = os.environ.get('WRITE_BEHIND_DURABLE', '1') == '1'
+
+# encoded GET /tracking/{year}/{month} bodies, keyed by month
+cache = make_cache()
+
+def invalidate_months(rows):
+    # drop only the cached months that the committed rows fall in
+    created_on = TRACK_COLUMNS.index("created_on")
+    for year, month in {month_of(row[created_on]) for row in rows}:
+        cache.invalidate(month_key(year, month))
+
+write_buffer = None
+if WRITE_BEHIND:
+    write_buffer = WriteBehindBuffer(
+        max_rows=int(os.environ.get('WRITE_BEHIND_MAX_ROWS', 500)),
+        interval=float(os.environ.get('WRITE_BEHIND_INTERVAL', 0.5)),
+        on_flush=invalidate_months,
+    )
+
+# async data-access layer used by the async handlers
+db_backend = make_backend()
 
 app = FastAPI()
 
+@app.on_event("startup")
+async def start_db_backend():
+    await db_backend.start()
+
 class Track(BaseModel):
     id: str
     telem_1: float
@@ -31,48 +115,152 @@ class Track(BaseModel):
 def read_root():
     return {"Hello": "Grabbing DB data!"}
 
+@app.get("/pool")
+def pool_metrics():
+    # wait time / in-use / created counts for sizing the connection pool
+    metrics = {"backend": db_backend.name, "sync": pool.metrics()}
+    if hasattr(db_backend, "metrics"):
+        metrics["async"] = db_backend.metrics()
+    return metrics
+
+def parse_day(value):
+    # optional YYYY-MM-DD query parameter -> datetime
+    if value is None:
+        return None
+    try:
+        return datetime.datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"bad date {value!r}, expected YYYY-MM-DD")
+
+@app.get("/tracking/within")
+async def tracks_within(bbox: str, from_: Optional[str] = Query(None, alias="from"),
+                        to: Optional[str] = None):
+    # points inside bbox=min_lon,min_lat,max_lon,max_lat, optionally in [from, to)
+    try:
+        box = spatial.parse_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    query, params = spatial.within_query(box, parse_day(from_), parse_day(to), SELECT_COLUMNS)
+    try:
+        headers, results = await db_backend.fetch_all(query, params)
+    except DatabaseError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return Response(content=encode_rows(headers, results), media_type="application/json")
+
+@app.get("/tracking/nearest")
+async def tracks_nearest(lon: float, lat: float, k: int = 10,
+                         from_: Optional[str] = Query(None, alias="from"), to: Optional[str] = None):
+    # the k points closest to (lon, lat), nearest first, with distance in meters
+    if not (-180 <= lon <= 180 and -90 <= lat <= 90) or not 1 <= k <= 1000:
+        raise HTTPException(status_code=400, detail="lon/lat out of range or k not in 1-1000")
+    try:
+        headers, found = await spatial.nearest(db_backend.fetch_all, lon, lat, k,
+                                               parse_day(from_), parse_day(to), columns=SELECT_COLUMNS)
+    except DatabaseError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if headers is None:
+        return Response(content=b"[]", media_type="application/json")
+    rows = [tuple(row) + (round(distance, 1),) for distance, row in found]
+    return Response(content=encode_rows(list(headers) + ["distance_m"], rows), media_type="application/json")
+
 @app.get("/tracking/{year}/{month}")
-def get_tracks(year: int, month: int):
-    # pay attention to dropped leading zeroes in months values
-    month2 = format(month, '02')
-    # perform a LIKE query
-    query = f"SELECT * FROM tracking WHERE created_on LIKE '{year}-{month2}-%';"
-    # set up cursor
-    c=db.cursor()
-    # execute query against cursor
-    c.execute(query)
-    # grab headers
-    headers=[x[0] for x in c.description]
-    # a fetchall to return results
-    results = c.fetchall()
-    # set up an empty container for results
-    data=[]
-    # iterate out results in a dict and append
-    for result in results:
-        data.append(dict(zip(headers,result)))
-    # pass data through the json encoder above
-    json_compatible_data = jsonable_encoder(data)
-    return JSONResponse(content=json_compatible_data)
+async def get_tracks(year: int, month: int):
+    # half-open [start, next month) range so the created_on index can be used
+    start, end = month_range(year, month)
+    # serve the already-encoded body if this month is cached
+    key = month_key(year, month)
+    body = cache.get(key)
+    if body is not None:
+        return Response(content=body, media_type="application/json")
+    generation = cache.generation(key)
+    query = f"SELECT {SELECT_COLUMNS} FROM tracking WHERE created_on >= %s AND created_on < %s;"
+    # execute without blocking the event loop; returns headers and all rows
+    try:
+        headers, results = await db_backend.fetch_all(query, (start, end))
+    except DatabaseError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    # encode every row straight to JSON bytes
+    body = encode_rows(headers, results)
+    cache.set(key, body, generation)
+    return Response(content=body, media_type="application/json")
     
+@app.get("/tracking/{year}/{month}/stream")
+def stream_tracks(year: int, month: int, format: str = "json"):
+    # same rows as get_tracks, streamed as a JSON array or newline-delimited JSON
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be json or ndjson")
+    start, end = month_range(year, month)
+    query = f"SELECT {SELECT_COLUMNS} FROM tracking WHERE created_on >= %s AND created_on < %s;"
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    return StreamingResponse(stream_rows(query, (start, end), format), media_type=media_type)
+
+@app.get("/tracking/{year}/{month}/summary")
+async def summarize_tracks(year: int, month: int, granularity: str = "day"):
+    # count/avg/min/max per metric and a bounding box, read from the rollup tables
+    if granularity not in TABLES:
+        raise HTTPException(status_code=400, detail="granularity must be hour or day")
+    start, end = month_range(year, month)
+    try:
+        _, rows = await db_backend.fetch_all(summary_query(granularity), (start, end))
+    except DatabaseError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return dict(year=year, month=month, granularity=granularity, **summarize(rows))
+
 @app.post("/tracking/", status_code=201)
-async def add_track(item: Track):
-    # get out columnar values from submitted payload
-    id = item.id
-    telem_1 = item.telem_1
-    telem_2 = item.telem_2
-    longitude = item.longitude
-    latitude = item.latitude
-    created_on = item.created_on
-    # pay attention to quote-wrapped values
-    query = f"INSERT INTO tracking (id,telem_1,telem_2,longitude,latitude,created_on) VALUES ('{id}','{telem_1}','{telem_2}','{longitude}','{latitude}','{created_on}');"
+async def add_track(item: Track, durable: bool = WRITE_BEHIND_DURABLE):
+    try:
+        row = track_row(item)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if write_buffer is None:
+        # write straight through: one parameterized insert and commit
+        try:
+            await db_backend.insert_tracks([row])
+            invalidate_months([row])
+            return {"created":"success","id":item.id}
+        except (DatabaseError) as e:
+            error_data = str(e)
+            raise HTTPException(status_code=400, detail=error_data)
+    # write-behind: queue the row and optionally wait for its batch to commit
+    future = write_buffer.add(row)
+    if not durable:
+        return {"created":"queued","id":item.id}
     try:
-        c=db.cursor()
-        c.execute(query)
-        # This time commit instead of fetchall()
-        results = db.commit()
-        return {"created":"success","id":id}
-        db.close()
+        await asyncio.wrap_future(future)
     except (MySQLdb.Error) as e:
         error_data = str(e)
         raise HTTPException(status_code=400, detail=error_data)
-        db.close()
+    except PoolTimeout as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"created":"success","id":item.id}
+
+@app.post("/tracking/batch", status_code=201)
+async def add_tracks(items: List[Track]):
+    # many rows, multi-row INSERTs, one commit
+    try:
+        rows = [track_row(item) for item in items]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        await db_backend.insert_tracks(rows)
+        invalidate_months(rows)
+    except (DatabaseError) as e:
+        error_data = str(e)
+        raise HTTPException(status_code=400, detail=error_data)
+    return {"created":"success","count":len(rows)}
+
+@app.get("/cache")
+def cache_metrics():
+    return cache.metrics()
+
+@app.get("/write-buffer")
+def write_buffer_metrics():
+    if write_buffer is None:
+        return {"enabled": False}
+    return dict(enabled=True, **write_buffer.metrics())
+
+@app.on_event("shutdown")
+async def shutdown():
+    if write_buffer is not None:
+        write_buffer.close()
+    await db_backend.close()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+
+# Apply the .sql files in ../migrations in name order, once each.
+# Applied files are recorded in a schema_migrations table so re-running is safe.
+
+import os
+import sys
+from database import pool
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'migrations')
+
+
+def statements(sql):
+    # strip comment lines, then split on ; into individual statements
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    return [s.strip() for s in "\n".join(lines).split(';') if s.strip()]
+
+
+def migrate(migrations_dir=MIGRATIONS_DIR):
+    with pool.connection() as db:
+        c = db.cursor()
+        c.execute("CREATE TABLE IF NOT EXISTS schema_migrations ("
+                  "name VARCHAR(255) PRIMARY KEY, "
+                  "applied_on DATETIME DEFAULT CURRENT_TIMESTAMP);")
+        c.execute("SELECT name FROM schema_migrations;")
+        applied = {row[0] for row in c.fetchall()}
+        for name in sorted(os.listdir(migrations_dir)):
+            if not name.endswith('.sql') or name in applied:
+                continue
+            with open(os.path.join(migrations_dir, name)) as f:
+                for statement in statements(f.read()):
+                    c.execute(statement)
+            c.execute("INSERT INTO schema_migrations (name) VALUES (%s);", (name,))
+            db.commit()
+            print("applied", name)
+        c.close()
+
+
+if __name__ == '__main__':
+    migrate(sys.argv[1] if len(sys.argv) > 1 else MIGRATIONS_DIR)
@@ -0,0 +1,122 @@
+# Hourly/daily rollups of tracking telemetry: count, sum, min and max of
+# telem_1/telem_2 plus a longitude/latitude bounding box per bucket.
+
+TABLES = {
+    "hour": "tracking_rollup_hourly",
+    "day": "tracking_rollup_daily",
+}
+
+METRICS = ("telem_1", "telem_2")
+BOX = ("longitude", "latitude")
+
+ROLLUP_COLUMNS = ("bucket", "n",
+                  "telem_1_sum", "telem_1_min", "telem_1_max",
+                  "telem_2_sum", "telem_2_min", "telem_2_max",
+                  "longitude_min", "longitude_max", "latitude_min", "latitude_max")
+
+# merge a partial rollup into whatever is already stored for the bucket
+UPSERT = "INSERT INTO {table} ({cols}) VALUES ({vals}) ON DUPLICATE KEY UPDATE {updates};"
+_UPDATES = ["n = n + VALUES(n)"]
+for _col in ROLLUP_COLUMNS[2:]:
+    if _col.endswith("_sum"):
+        _UPDATES.append(f"{_col} = {_col} + VALUES({_col})")
+    elif _col.endswith("_min"):
+        _UPDATES.append(f"{_col} = LEAST({_col}, VALUES({_col}))")
+    else:
+        _UPDATES.append(f"{_col} = GREATEST({_col}, VALUES({_col}))")
+
+UPSERTS = {
+    granularity: UPSERT.format(
+        table=table,
+        cols=",".join(ROLLUP_COLUMNS),
+        vals=",".join(["%s"] * len(ROLLUP_COLUMNS)),
+        updates=", ".join(_UPDATES))
+    for granularity, table in TABLES.items()
+}
+
+
+def bucket_of(created_on, granularity):
+    # datetime(2020, 8, 23, 10, 26, 20) -> '2020-08-23 10:00:00' (hour) / '2020-08-23 00:00:00' (day)
+    if granularity == "hour":
+        return created_on.strftime("%Y-%m-%d %H:00:00")
+    return created_on.strftime("%Y-%m-%d 00:00:00")
+
+
+def aggregate(rows, columns, granularity):
+    # rows are tuples in `columns` order with created_on as a datetime
+    # (see writes.track_row); returns one partial rollup row per bucket
+    idx = {name: columns.index(name) for name in METRICS + BOX + ("created_on",)}
+    buckets = {}
+    for row in rows:
+        bucket = bucket_of(row[idx["created_on"]], granularity)
+        agg = buckets.get(bucket)
+        values = {name: float(row[idx[name]]) for name in METRICS + BOX}
+        if agg is None:
+            agg = buckets[bucket] = {"n": 0}
+            for name in METRICS:
+                agg[name] = [0.0, values[name], values[name]]
+            for name in BOX:
+                agg[name] = [values[name], values[name]]
+        agg["n"] += 1
+        for name in METRICS:
+            stats = agg[name]
+            stats[0] += values[name]
+            stats[1] = min(stats[1], values[name])
+            stats[2] = max(stats[2], values[name])
+        for name in BOX:
+            box = agg[name]
+            box[0] = min(box[0], values[name])
+            box[1] = max(box[1], values[name])
+    out = []
+    for bucket, agg in sorted(buckets.items()):
+        out.append((bucket, agg["n"], *agg["telem_1"], *agg["telem_2"],
+                    *agg["longitude"], *agg["latitude"]))
+    return out
+
+
+def rollup_updates(rows, columns):
+    # (statement, params) pairs that fold `rows` into every rollup table;
+    # run them in the same transaction as the insert
+    return [(UPSERTS[granularity], aggregate(rows, columns, granularity))
+            for granularity in TABLES]
+
+
+def summary_query(granularity):
+    return (f"SELECT {','.join(ROLLUP_COLUMNS)} FROM {TABLES[granularity]} "
+            "WHERE bucket >= %s AND bucket < %s ORDER BY bucket;")
+
+
+def summarize(rollup_rows):
+    # rollup rows -> per-bucket dicts with averages, plus an overall total
+    buckets = []
+    total = None
+    for row in rollup_rows:
+        r = dict(zip(ROLLUP_COLUMNS, row))
+        buckets.append(_describe(r))
+        if total is None:
+            total = dict(r)
+            del total["bucket"]
+        else:
+            total["n"] += r["n"]
+            for col in ROLLUP_COLUMNS[2:]:
+                if col.endswith("_sum"):
+                    total[col] += r[col]
+                elif col.endswith("_min"):
+                    total[col] = min(total[col], r[col])
+                else:
+                    total[col] = max(total[col], r[col])
+    return {"total": _describe(total) if total else {"n": 0}, "buckets": buckets}
+
+
+def _describe(r):
+    out = {"n": r["n"]}
+    if "bucket" in r:
+        out["bucket"] = str(r["bucket"])
+    for name in METRICS:
+        out[name] = {
+            "avg": r[f"{name}_sum"] / r["n"],
+            "min": r[f"{name}_min"],
+            "max": r[f"{name}_max"],
+        }
+    out["bbox"] = [r["longitude_min"], r["latitude_min"], r["longitude_max"], r["latitude_max"]]
+    return out
@@ -0,0 +1,107 @@
+# Fast JSON encoding of database rows.
+#
+# Instead of building a dict per row and walking it with a generic encoder,
+# row_encoder() compiles one function per cursor's column list that writes the
+# pre-escaped column names and each value straight into a JSON object string.
+# Decimal, datetime, date, time and timedelta are handled natively:
+# Decimals are written as exact JSON numbers, dates and datetimes as ISO 8601.
+
+import datetime
+import decimal
+from json.encoder import encode_basestring
+
+
+def _float(v):
+    # NaN/Infinity are not valid JSON
+    if v != v or v in (float("inf"), float("-inf")):
+        return "null"
+    return float.__repr__(v)
+
+
+def _decimal(v):
+    if not v.is_finite():
+        return "null"
+    return str(v)
+
+
+def _timedelta(v):
+    # MySQL TIME columns come back as timedelta: render as [-]HH:MM:SS[.ffffff]
+    sign = "-" if v < datetime.timedelta(0) else ""
+    # timedelta keeps microseconds non-negative (-5.3s is -6s + 0.7s), so work on abs(v)
+    v = abs(v)
+    seconds = v.days * 86400 + v.seconds
+    text = f"{sign}{seconds // 3600:02}:{seconds // 60 % 60:02}:{seconds % 60:02}"
+    if v.microseconds:
+        text += f".{v.microseconds:06}"
+    return '"' + text + '"'
+
+
+_ENCODERS = {
+    type(None): lambda v: "null",
+    str: encode_basestring,
+    int: int.__repr__,
+    bool: lambda v: "true" if v else "false",
+    float: _float,
+    decimal.Decimal: _decimal,
+    datetime.datetime: lambda v: '"' + v.isoformat() + '"',
+    datetime.date: lambda v: '"' + v.isoformat() + '"',
+    datetime.time: lambda v: '"' + v.isoformat() + '"',
+    datetime.timedelta: _timedelta,
+    bytes: lambda v: encode_basestring(v.decode("utf-8", "replace")),
+}
+
+
+def encode_value(v):
+    # any value -> JSON text, by the same rules as the row encoder. Subclasses
+    # (IntEnum, str subclasses, ...) use their base type's encoder and lists,
+    # tuples and dicts are encoded element by element, so a Decimal stays exact
+    # wherever it appears.
+    encoder = _ENCODERS.get(type(v))
+    if encoder is not None:
+        return encoder(v)
+    for cls in type(v).__mro__[1:]:
+        encoder = _ENCODERS.get(cls)
+        if encoder is not None:
+            return encoder(v)
+    if isinstance(v, dict):
+        # non-string keys become their JSON text, as json.dumps does (True -> "true")
+        return "{" + ",".join(encode_basestring(k if isinstance(k, str) else encode_value(k).strip('"'))
+                              + ":" + encode_value(item)
+                              for k, item in v.items()) + "}"
+    if isinstance(v, (list, tuple)):
+        return "[" + ",".join(map(encode_value, v)) + "]"
+    raise TypeError(f"{type(v).__name__} is not JSON serializable")
+
+
+def column_names(description):
+    # DB-API cursor.description -> column names
+    return [d[0] for d in description]
+
+
+def row_encoder(names):
+    # column names, in row order -> function from row tuple to JSON object str
+    if not names:
+        return lambda row: "{}"
+    # unpack the row once, then look each value's encoder up by exact type
+    args = ", ".join(f"v{i}" for i in range(len(names)))
+    parts = []
+    for i, name in enumerate(names):
+        prefix = ("{" if i == 0 else ",") + encode_basestring(name) + ":"
+        parts.append(f"{prefix!r} + _get(type(v{i}), _v)(v{i})")
+    source = (f"def encode(row):\n    {args}, = row\n"
+              "    return " + " + ".join(parts) + " + '}'\n")
+    namespace = {"_get": _ENCODERS.get, "_v": encode_value}
+    exec(source, namespace)
+    return namespace["encode"]
+
+
+def encode_rows(names, rows):
+    # whole result set -> JSON array bytes
+    encode = row_encoder(names)
+    return ("[" + ",".join(map(encode, rows)) + "]").encode("utf-8")
+
+
+def encode_ndjson(names, rows):
+    # whole result set -> newline-delimited JSON bytes
+    encode = row_encoder(names)
+    return "".join(encode(row) + "\n" for row in rows).encode("utf-8")
@@ -0,0 +1,135 @@
+# Grid-cell spatial lookups over tracking longitude/latitude.
+#
+# The world is cut into CELL_DEG x CELL_DEG cells; tracking.cell (migration 003)
+# holds each point's cell and is indexed together with created_on. A bounding
+# box becomes a list of cells to probe through that index, then an exact
+# lon/lat filter on the few rows that come back.
+
+import math
+
+CELL_DEG = 0.5
+N_COLS = int(360 / CELL_DEG)
+N_ROWS = int(180 / CELL_DEG)
+EARTH_RADIUS_M = 6371008.8
+# beyond this many cells, probing the index costs more than a plain scan
+MAX_CELLS = 4000
+
+
+def _col(lon):
+    return min(int(math.floor((lon + 180) / CELL_DEG)), N_COLS - 1)
+
+
+def _row(lat):
+    return min(int(math.floor((lat + 90) / CELL_DEG)), N_ROWS - 1)
+
+
+def cell_of(lon, lat):
+    return _row(lat) * N_COLS + _col(lon)
+
+
+def parse_bbox(value):
+    # "min_lon,min_lat,max_lon,max_lat" -> tuple of floats
+    parts = [float(p) for p in value.split(",")]
+    if len(parts) != 4:
+        raise ValueError("bbox must be min_lon,min_lat,max_lon,max_lat")
+    min_lon, min_lat, max_lon, max_lat = parts
+    if not (-180 <= min_lon <= max_lon <= 180 and -90 <= min_lat <= max_lat <= 90):
+        raise ValueError("bbox out of range or min > max")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def cells_in_bbox(bbox):
+    min_lon, min_lat, max_lon, max_lat = bbox
+    return [row * N_COLS + col
+            for row in range(_row(min_lat), _row(max_lat) + 1)
+            for col in range(_col(min_lon), _col(max_lon) + 1)]
+
+
+def ring_cells(lon, lat, r):
+    # cells exactly r steps (Chebyshev distance) from the point's cell
+    row0, col0 = _row(lat), _col(lon)
+    if r == 0:
+        return [row0 * N_COLS + col0]
+    cells = []
+    for row in range(row0 - r, row0 + r + 1):
+        if not 0 <= row < N_ROWS:
+            continue
+        if abs(row - row0) == r:
+            cols = range(col0 - r, col0 + r + 1)
+        else:
+            cols = (col0 - r, col0 + r)
+        for col in cols:
+            cells.append(row * N_COLS + col % N_COLS)
+    return sorted(set(cells))
+
+
+def ring_gap_m(lat, r):
+    # lower bound on the distance from a point to anything outside its first
+    # r rings: at least r cells of latitude, and r cells of longitude measured
+    # at the highest latitude those rings reach
+    if r == 0:
+        return 0.0
+    deg = r * CELL_DEG
+    widest = min(abs(lat) + deg, 90.0)
+    meters_per_deg = math.pi * EARTH_RADIUS_M / 180
+    return deg * meters_per_deg * min(1.0, math.cos(math.radians(widest)))
+
+
+def haversine_m(lon1, lat1, lon2, lat2):
+    lon1, lat1, lon2, lat2 = map(math.radians, (lon1, lat1, lon2, lat2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def time_filter(start, end):
+    # optional created_on range -> (sql, params)
+    sql, params = "", []
+    if start is not None:
+        sql += " AND created_on >= %s"
+        params.append(start)
+    if end is not None:
+        sql += " AND created_on < %s"
+        params.append(end)
+    return sql, params
+
+
+def within_query(bbox, start=None, end=None, columns="*"):
+    # `columns`: the select list; the API passes its own so the cell column stays internal
+    min_lon, min_lat, max_lon, max_lat = bbox
+    cells = cells_in_bbox(bbox)
+    sql = f"SELECT {columns} FROM tracking WHERE longitude BETWEEN %s AND %s AND latitude BETWEEN %s AND %s"
+    params = [min_lon, max_lon, min_lat, max_lat]
+    if len(cells) <= MAX_CELLS:
+        sql += " AND cell IN (" + ",".join(["%s"] * len(cells)) + ")"
+        params += cells
+    extra_sql, extra_params = time_filter(start, end)
+    return sql + extra_sql + " ORDER BY created_on;", params + extra_params
+
+
+def cells_query(cells, start=None, end=None, columns="*"):
+    sql = f"SELECT {columns} FROM tracking WHERE cell IN (" + ",".join(["%s"] * len(cells)) + ")"
+    extra_sql, extra_params = time_filter(start, end)
+    return sql + extra_sql + ";", list(cells) + extra_params
+
+
+async def nearest(fetch_all, lon, lat, k, start=None, end=None, max_rings=100, columns="*"):
+    # Expanding-ring k-nearest search. Probe ring 0, 1, 2, ... around the
+    # point's cell until k candidates are known and the next unprobed ring
+    # is provably farther than the k-th best. `fetch_all(query, params)`
+    # returns (headers, rows) as in async_db.
+    found = []
+    headers = None
+    for r in range(max_rings + 1):
+        cells = ring_cells(lon, lat, r)
+        if cells:
+            query, params = cells_query(cells, start, end, columns)
+            headers, rows = await fetch_all(query, params)
+            lon_i, lat_i = headers.index("longitude"), headers.index("latitude")
+            for row in rows:
+                found.append((haversine_m(lon, lat, float(row[lon_i]), float(row[lat_i])), row))
+            found.sort(key=lambda pair: pair[0])
+            del found[k:]
+        if len(found) == k and found[-1][0] <= ring_gap_m(lat, r):
+            break
+    return headers, found
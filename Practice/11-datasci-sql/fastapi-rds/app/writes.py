@@ -0,0 +1,194 @@
+import concurrent.futures
+import datetime
+import logging
+import os
+import re
+import threading
+import time
+import MySQLdb
+from database import pool
+from rollups import rollup_updates
+
+log = logging.getLogger(__name__)
+
+TRACK_COLUMNS = ("id", "telem_1", "telem_2", "longitude", "latitude", "created_on")
+INSERT_TRACK = "INSERT INTO tracking ({}) VALUES ({});".format(
+    ",".join(TRACK_COLUMNS), ",".join(["%s"] * len(TRACK_COLUMNS)))
+
+# rows per INSERT statement; keeps each statement well under max_allowed_packet
+INSERT_CHUNK_SIZE = 1000
+# keep the hourly/daily rollup tables up to date on every insert (migration 002)
+ROLLUPS = os.environ.get('ROLLUPS', '1') == '1'
+
+
+# '2020-08-23T10:26:20Z', '2020-8-5 10:26', '2020-08-23 10:26:20.5+02:00', '2020-08-23'
+CREATED_ON = re.compile(
+    r"\s*(\d{4})-(\d{1,2})-(\d{1,2})"
+    r"(?:[T ](\d{1,2}):(\d{1,2})(?::(\d{1,2})(?:\.(\d{1,6})\d*)?)?)?"
+    r"\s*(Z|[+-]\d{2}:?\d{2})?\s*$", re.IGNORECASE)
+
+
+def parse_created_on(value):
+    # created_on string -> naive UTC datetime; raises ValueError if it isn't a date/time
+    if isinstance(value, datetime.datetime):
+        parsed = value
+    else:
+        m = CREATED_ON.match(str(value))
+        if not m:
+            raise ValueError(f"bad created_on {value!r}, expected YYYY-MM-DD[ HH:MM[:SS]]")
+        year, month, day, hour, minute, second, fraction, offset = m.groups()
+        parsed = datetime.datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0),
+                                   int(second or 0), int((fraction or "0").ljust(6, "0")))
+        if offset and offset.upper() != "Z":
+            sign = -1 if offset[0] == "-" else 1
+            digits = offset[1:].replace(":", "")
+            tz = datetime.timezone(sign * datetime.timedelta(hours=int(digits[:2]), minutes=int(digits[2:])))
+            parsed = parsed.replace(tzinfo=tz)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def track_row(item):
+    # Track model -> tuple in TRACK_COLUMNS order, created_on parsed once here
+    # so rollup buckets and cache months come from a real datetime
+    return tuple(parse_created_on(item.created_on) if col == "created_on" else getattr(item, col)
+                 for col in TRACK_COLUMNS)
+
+
+def insert_tracks(conn, rows, chunk_size=INSERT_CHUNK_SIZE):
+    # MySQLdb rewrites executemany() on an INSERT ... VALUES into a single
+    # multi-row statement, so each chunk is one round trip. One commit for all,
+    # including the rollup upserts, so rollups never drift from the raw rows.
+    c = conn.cursor()
+    try:
+        for i in range(0, len(rows), chunk_size):
+            c.executemany(INSERT_TRACK, rows[i:i + chunk_size])
+        if ROLLUPS:
+            for statement, params in rollup_updates(rows, TRACK_COLUMNS):
+                c.executemany(statement, params)
+        conn.commit()
+    finally:
+        c.close()
+    return len(rows)
+
+
+class WriteBehindBuffer:
+    """Collects single-row inserts and writes them in batches.
+
+    A background thread flushes when `max_rows` are waiting or every
+    `interval` seconds, whichever comes first. `add()` returns a Future that
+    resolves once the row's batch has been committed (or fails with the
+    database error), so callers can choose to wait for a durable ack. A row
+    the database rejects fails only its own future; the rest of its batch is
+    retried without it.
+    """
+
+    def __init__(self, max_rows=500, interval=0.5, on_flush=None):
+        self.max_rows = max_rows
+        self.interval = interval
+        # called with the committed rows after each successful flush
+        self.on_flush = on_flush
+        self._pending = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self.flushes = 0
+        self.rows_written = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def add(self, row):
+        future = concurrent.futures.Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("write-behind buffer is closed")
+            self._pending.append((row, future))
+            if len(self._pending) >= self.max_rows:
+                self._cond.notify()
+        return future
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if len(self._pending) < self.max_rows and not self._closed:
+                    # give the batch until the interval is up to fill
+                    self._cond.wait(self.interval)
+                batch, self._pending = self._pending, []
+                closed = self._closed
+            if batch:
+                self._flush(batch)
+            if closed and not batch:
+                return
+
+    def _flush(self, batch):
+        start = time.monotonic()
+        written = []
+        try:
+            with pool.connection() as conn:
+                self._write(conn, batch, written)
+        except Exception as e:
+            # no connection, or it died mid-batch: fail the rows that weren't
+            # committed (or already failed); the committed ones still succeed below
+            committed = {id(entry) for entry in written}
+            self._fail([entry for entry in batch
+                        if id(entry) not in committed and not entry[1].done()], e)
+        if written:
+            self.flushes += 1
+            self.rows_written += len(written)
+            log.debug("flushed %d rows in %.1f ms", len(written), 1000 * (time.monotonic() - start))
+            rows = [row for row, _ in written]
+            if self.on_flush:
+                # the rows are committed whatever on_flush does; a failure here must
+                # not kill the flush thread or leave the callers' futures hanging
+                try:
+                    self.on_flush(rows)
+                except Exception:
+                    log.exception("write-behind on_flush callback failed")
+            for _, future in written:
+                future.set_result(True)
+
+    def _write(self, conn, batch, written):
+        # Insert the batch in one transaction. If a row is rejected, split the
+        # batch in half and retry each half, so the rows around a bad one still
+        # get written and only the bad row's caller sees the error. Committed
+        # (row, future) pairs are appended to `written` as each piece commits;
+        # rejected ones get their exception set. Connection-level errors are
+        # raised: retrying on the same connection would only fail again.
+        try:
+            insert_tracks(conn, [row for row, _ in batch])
+            written.extend(batch)
+            return
+        except (MySQLdb.OperationalError, MySQLdb.InterfaceError):
+            raise
+        except Exception as e:
+            conn.rollback()
+            if len(batch) == 1:
+                self._fail(batch, e)
+                return
+        mid = len(batch) // 2
+        self._write(conn, batch[:mid], written)
+        self._write(conn, batch[mid:], written)
+
+    def _fail(self, batch, e):
+        self.errors += 1
+        log.error("write-behind insert of %d rows failed: %s", len(batch), e)
+        for _, future in batch:
+            future.set_exception(e)
+
+    def close(self):
+        # flush whatever is left and stop the background thread
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def metrics(self):
+        with self._cond:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "errors": self.errors,
+        }
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+# Compare per-row insert + commit (the old POST /tracking/ path) with chunked
+# multi-row inserts and a single commit (POST /tracking/batch, write-behind).
+# Uses an on-disk SQLite database with synchronous=FULL as a stand-in for
+# MySQL, so every commit pays for an fsync just like InnoDB does:
+#
+#   python3 benchmarks/insert_throughput.py --rows 20000
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+CREATE = ("CREATE TABLE tracking (id VARCHAR(40) PRIMARY KEY, telem_1 DECIMAL(5,4), "
+          "telem_2 DECIMAL(5,4), longitude VARCHAR(50), latitude VARCHAR(50), created_on DATETIME)")
+INSERT = "INSERT INTO tracking VALUES (?, ?, ?, ?, ?, ?)"
+
+
+def make_rows(n, prefix):
+    rnd = random.Random(7)
+    return [(f"{prefix}-{i}", round(rnd.random(), 4), round(rnd.random(), 4),
+             rnd.uniform(-180, 180), rnd.uniform(-90, 90), '2020-08-01 00:00:00')
+            for i in range(n)]
+
+
+def per_row(db, rows):
+    for row in rows:
+        db.execute(INSERT, row)
+        db.commit()
+
+
+def batched(chunk_size):
+    def run(db, rows):
+        # one multi-row VALUES statement per chunk, like MySQLdb's executemany rewrite
+        for i in range(0, len(rows), chunk_size):
+            chunk = rows[i:i + chunk_size]
+            values = ",".join(["(?, ?, ?, ?, ?, ?)"] * len(chunk))
+            db.execute("INSERT INTO tracking VALUES " + values, [v for row in chunk for v in row])
+        db.commit()
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="per-row vs. batched insert throughput")
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--chunk', type=int, default=150,
+                        help="rows per INSERT (SQLite caps bound parameters per statement)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = sqlite3.connect(os.path.join(tmp, 'tracking.db'))
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=FULL")
+        db.execute(CREATE)
+        for label, fn in [("per-row commit", per_row), (f"batched x{args.chunk}", batched(args.chunk))]:
+            rows = make_rows(args.rows, label)
+            t = time.perf_counter()
+            fn(db, rows)
+            elapsed = time.perf_counter() - t
+            print(f"{label:<16} {len(rows) / elapsed:12,.0f} rows/s  ({elapsed:.2f}s)")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+# Mixed read/write load against a running instance of the API, reporting
+# p50/p99 latency per request type. Run it once per DB_ASYNC backend:
+#
+#   DB_ASYNC=inline   uvicorn main:app --port 8000   # before: blocking calls on the loop
+#   DB_ASYNC=thread   uvicorn main:app --port 8000   # sync driver offloaded to threads
+#   DB_ASYNC=aiomysql uvicorn main:app --port 8000   # async driver and pool
+#
+#   python3 benchmarks/mixed_latency.py --url http://localhost:8000 --requests 2000
+#
+# Start the server with CACHE_TTL=0 so every read reaches the database.
+
+import argparse
+import concurrent.futures
+import json
+import random
+import statistics
+import time
+import urllib.request
+import uuid
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def do_read(url, rnd):
+    year, month = rnd.choice([2019, 2020, 2021]), rnd.randint(1, 12)
+    with urllib.request.urlopen(f"{url}/tracking/{year}/{month}") as r:
+        r.read()
+
+
+def do_write(url, rnd):
+    body = json.dumps({
+        "id": str(uuid.uuid4()),
+        "telem_1": round(rnd.random(), 4),
+        "telem_2": round(rnd.random(), 4),
+        "longitude": rnd.uniform(-180, 180),
+        "latitude": rnd.uniform(-90, 90),
+        "created_on": f"2020-{rnd.randint(1, 12):02}-01 00:00:00",
+    }).encode()
+    req = urllib.request.Request(f"{url}/tracking/", data=body, method="POST",
+                                 headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req) as r:
+        r.read()
+
+
+def one(url, write_ratio, seed):
+    rnd = random.Random(seed)
+    kind = "write" if rnd.random() < write_ratio else "read"
+    t = time.perf_counter()
+    (do_write if kind == "write" else do_read)(url, rnd)
+    return kind, time.perf_counter() - t
+
+
+def main():
+    parser = argparse.ArgumentParser(description="mixed read/write latency benchmark")
+    parser.add_argument('--url', default="http://localhost:8000")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--write-ratio', type=float, default=0.3)
+    args = parser.parse_args()
+
+    latencies = {"read": [], "write": []}
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(args.concurrency) as ex:
+        futures = [ex.submit(one, args.url, args.write_ratio, i) for i in range(args.requests)]
+        for f in concurrent.futures.as_completed(futures):
+            kind, elapsed = f.result()
+            latencies[kind].append(elapsed)
+    total = time.perf_counter() - start
+
+    print(f"{args.requests} requests in {total:.1f}s ({args.requests / total:,.0f} req/s)")
+    for kind, values in latencies.items():
+        if values:
+            print(f"{kind:<6} n={len(values):<6} p50={1000 * statistics.median(values):8.1f} ms"
+                  f"  p99={1000 * percentile(values, 99):8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+# Compare the old LIKE month filter with the half-open range filter.
+# Uses an on-disk SQLite database as a stand-in for MySQL so it runs anywhere:
+#
+#   python3 benchmarks/month_query.py --rows 2000000
+
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+LIKE_QUERY = "SELECT * FROM tracking WHERE created_on LIKE ?"
+RANGE_QUERY = "SELECT * FROM tracking WHERE created_on >= ? AND created_on < ?"
+
+
+def seed(db, rows, batch=50000):
+    db.execute("CREATE TABLE tracking (id VARCHAR(40) PRIMARY KEY, telem_1 DECIMAL(5,4), "
+               "telem_2 DECIMAL(5,4), longitude VARCHAR(50), latitude VARCHAR(50), created_on DATETIME)")
+    start = datetime.datetime(2018, 1, 1)
+    span = int((datetime.datetime(2022, 1, 1) - start).total_seconds())
+    rnd = random.Random(42)
+    for offset in range(0, rows, batch):
+        data = []
+        for i in range(offset, min(offset + batch, rows)):
+            created = start + datetime.timedelta(seconds=rnd.randrange(span))
+            data.append((str(i), round(rnd.random(), 4), round(rnd.random(), 4),
+                         rnd.uniform(-180, 180), rnd.uniform(-90, 90),
+                         created.strftime('%Y-%m-%d %H:%M:%S')))
+        db.executemany("INSERT INTO tracking VALUES (?, ?, ?, ?, ?, ?)", data)
+    db.commit()
+
+
+def timed(db, query, params, repeat):
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        count = len(db.execute(query, params).fetchall())
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+    return best, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LIKE vs. range month query benchmark")
+    parser.add_argument('--rows', type=int, default=2000000)
+    parser.add_argument('--year', type=int, default=2020)
+    parser.add_argument('--month', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    start = datetime.datetime(args.year, args.month, 1)
+    end = (start + datetime.timedelta(days=32)).replace(day=1)
+    like_params = (f"{args.year}-{args.month:02}-%",)
+    range_params = (start.strftime('%Y-%m-%d %H:%M:%S'), end.strftime('%Y-%m-%d %H:%M:%S'))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = sqlite3.connect(os.path.join(tmp, 'tracking.db'))
+        t = time.perf_counter()
+        seed(db, args.rows)
+        print(f"seeded {args.rows:,} rows in {time.perf_counter() - t:.1f}s")
+
+        results = [("LIKE, no index", LIKE_QUERY, like_params),
+                   ("range, no index", RANGE_QUERY, range_params)]
+        for label, query, params in results:
+            elapsed, count = timed(db, query, params, args.repeat)
+            print(f"{label:<18} {elapsed * 1000:9.1f} ms  ({count:,} rows)")
+
+        db.execute("CREATE INDEX idx_tracking_created_on ON tracking (created_on)")
+        results = [("LIKE, indexed", LIKE_QUERY, like_params),
+                   ("range, indexed", RANGE_QUERY, range_params)]
+        for label, query, params in results:
+            elapsed, count = timed(db, query, params, args.repeat)
+            plan = db.execute("EXPLAIN QUERY PLAN " + query, params).fetchall()[-1][-1]
+            print(f"{label:<18} {elapsed * 1000:9.1f} ms  ({count:,} rows)  plan: {plan}")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
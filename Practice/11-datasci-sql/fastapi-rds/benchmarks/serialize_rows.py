@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+# Rows/sec for turning tracking rows into a JSON response body:
+#   dict(zip()) + jsonable_encoder + JSONResponse  (old main.py, needs fastapi)
+#   dict(zip()) + json.dumps(default=Decoder)       (old logistics_query.py)
+#   serialize.encode_rows                           (shared compiled row encoder)
+#
+#   python3 benchmarks/serialize_rows.py --rows 200000
+
+import argparse
+import datetime
+import decimal
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+from serialize import encode_rows  # noqa: E402
+
+HEADERS = ["id", "telem_1", "telem_2", "longitude", "latitude", "created_on"]
+
+
+def Decoder(o):
+    if isinstance(o, datetime.datetime):
+        return str(o)
+    if isinstance(o, decimal.Decimal):
+        return o.__str__()
+
+
+def make_rows(n):
+    rnd = random.Random(1)
+    start = datetime.datetime(2020, 8, 1)
+    return [(f"{rnd.getrandbits(128):032x}",
+             decimal.Decimal(f"{rnd.random():.4f}"), decimal.Decimal(f"{rnd.random():.4f}"),
+             f"{rnd.uniform(-180, 180):.7f}", f"{rnd.uniform(-90, 90):.7f}",
+             start + datetime.timedelta(seconds=rnd.randrange(2678400)))
+            for _ in range(n)]
+
+
+def old_fastapi(rows):
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    data = [dict(zip(HEADERS, row)) for row in rows]
+    return JSONResponse(content=jsonable_encoder(data)).body
+
+
+def old_json_dumps(rows):
+    data = [dict(zip(HEADERS, row)) for row in rows]
+    return json.dumps(data, default=Decoder).encode()
+
+
+def new_encoder(rows):
+    return encode_rows(HEADERS, rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="row serialization throughput")
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    candidates = [("jsonable_encoder", old_fastapi), ("json.dumps+Decoder", old_json_dumps),
+                  ("serialize.encode_rows", new_encoder)]
+    for label, fn in candidates:
+        try:
+            best = None
+            for _ in range(args.repeat):
+                t = time.perf_counter()
+                body = fn(rows)
+                elapsed = time.perf_counter() - t
+                best = elapsed if best is None else min(best, elapsed)
+        except ImportError as e:
+            print(f"{label:<22} skipped ({e})")
+            continue
+        print(f"{label:<22} {args.rows / best:12,.0f} rows/s  ({len(body) / 1e6:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+# Bounding-box and k-nearest lookups: full scan vs. the grid-cell index used by
+# GET /tracking/within and GET /tracking/nearest. SQLite stand-in for MySQL:
+#
+#   python3 benchmarks/spatial_query.py --rows 3000000
+
+import argparse
+import asyncio
+import heapq
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+import spatial  # noqa: E402
+
+
+def seed(db, rows, batch=100000):
+    db.execute("CREATE TABLE tracking (id TEXT PRIMARY KEY, telem_1 REAL, telem_2 REAL, "
+               "longitude REAL, latitude REAL, created_on TEXT, cell INTEGER)")
+    rnd = random.Random(3)
+    for offset in range(0, rows, batch):
+        data = []
+        for i in range(offset, min(offset + batch, rows)):
+            lon, lat = rnd.uniform(-180, 180), rnd.uniform(-90, 90)
+            data.append((str(i), rnd.random(), rnd.random(), lon, lat,
+                         f"2020-{rnd.randint(1, 12):02}-15 00:00:00", spatial.cell_of(lon, lat)))
+        db.executemany("INSERT INTO tracking VALUES (?, ?, ?, ?, ?, ?, ?)", data)
+    db.commit()
+
+
+def sqlite_sql(query):
+    return query.replace("%s", "?")
+
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="grid-cell vs. full scan spatial benchmark")
+    parser.add_argument('--rows', type=int, default=3000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    bbox = (-79.0, 37.5, -77.5, 39.0)
+    lon, lat = -78.5, 38.03
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = sqlite3.connect(os.path.join(tmp, 'tracking.db'))
+        t = time.perf_counter()
+        seed(db, args.rows)
+        print(f"seeded {args.rows:,} rows in {time.perf_counter() - t:.1f}s")
+
+        scan_sql = ("SELECT * FROM tracking WHERE longitude BETWEEN ? AND ? "
+                    "AND latitude BETWEEN ? AND ? ORDER BY created_on")
+        scan_params = (bbox[0], bbox[2], bbox[1], bbox[3])
+        elapsed, rows = best_of(lambda: db.execute(scan_sql, scan_params).fetchall(), args.repeat)
+        print(f"bbox full scan      {elapsed * 1000:9.1f} ms  ({len(rows)} rows)")
+
+        def naive_knn():
+            return heapq.nsmallest(args.k, (
+                (spatial.haversine_m(lon, lat, r[0], r[1]), r)
+                for r in db.execute("SELECT longitude, latitude FROM tracking")))
+        elapsed, naive = best_of(naive_knn, 1)
+        print(f"k-nearest full scan {elapsed * 1000:9.1f} ms  (k={args.k})")
+
+        db.execute("CREATE INDEX idx_tracking_cell_created_on ON tracking (cell, created_on)")
+
+        query, params = spatial.within_query(bbox)
+        elapsed, rows = best_of(lambda: db.execute(sqlite_sql(query), params).fetchall(), args.repeat)
+        print(f"bbox cell index     {elapsed * 1000:9.1f} ms  ({len(rows)} rows)")
+
+        async def fetch_all(query, params):
+            c = db.execute(sqlite_sql(query), params)
+            return [x[0] for x in c.description], c.fetchall()
+
+        elapsed, (_, found) = best_of(
+            lambda: asyncio.run(spatial.nearest(fetch_all, lon, lat, args.k)), args.repeat)
+        print(f"k-nearest cell ring {elapsed * 1000:9.1f} ms  (k={args.k})")
+        same = [round(d, 3) for d, _ in found] == [round(d, 3) for d, _ in naive]
+        print("k-nearest results match full scan:", same)
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,3 @@
+-- Month queries filter on a half-open created_on range; index it so they
+-- become a range scan instead of a full table scan.
+CREATE INDEX idx_tracking_created_on ON tracking (created_on);
@@ -0,0 +1,18 @@
+-- Hourly and daily telemetry rollups, maintained incrementally on insert and
+-- rebuilt for a date range by app/backfill_rollups.py.
+CREATE TABLE tracking_rollup_hourly (
+	bucket DATETIME NOT NULL,
+	n BIGINT NOT NULL,
+	telem_1_sum DOUBLE NOT NULL,
+	telem_1_min DOUBLE NOT NULL,
+	telem_1_max DOUBLE NOT NULL,
+	telem_2_sum DOUBLE NOT NULL,
+	telem_2_min DOUBLE NOT NULL,
+	telem_2_max DOUBLE NOT NULL,
+	longitude_min DOUBLE NOT NULL,
+	longitude_max DOUBLE NOT NULL,
+	latitude_min DOUBLE NOT NULL,
+	latitude_max DOUBLE NOT NULL,
+	PRIMARY KEY (bucket)
+);
+CREATE TABLE tracking_rollup_daily LIKE tracking_rollup_hourly;
@@ -0,0 +1,9 @@
+-- Grid cell of each point (0.5 x 0.5 degree cells, 720 per row of latitude),
+-- generated from longitude/latitude so no insert path has to compute it.
+-- Must match CELL_DEG in app/spatial.py.
+ALTER TABLE tracking
+	ADD COLUMN cell INT AS (
+		LEAST(FLOOR((latitude + 90) / 0.5), 359) * 720 +
+		LEAST(FLOOR((longitude + 180) / 0.5), 719)
+	) STORED;
+CREATE INDEX idx_tracking_cell_created_on ON tracking (cell, created_on);
@@ -0,0 +1,5 @@
+-- logistics_query.py pages through logistics in (created_on, id) order and
+-- filters months on a half-open created_on range. Index both columns, in that
+-- order, so every page and every month is a range scan that is already sorted.
+-- Run once after loading logistsics.sql.
+CREATE INDEX idx_logistics_created_on_id ON logistics (created_on, id);
@@ -1,40 +1,49 @@
 #!/usr/bin/env python3
 
+import argparse
+import concurrent.futures
+import datetime
 import json
 import os
+import sys
+import time
 import MySQLdb
 import MySQLdb._exceptions
-import decimal
-from decimal import Decimal
-import datetime
+import MySQLdb.cursors
 
-def Decoder(o):
-    if isinstance(o, datetime.datetime):
-        return str(o)
-    if isinstance(o, decimal.Decimal):
-        return o.__str__()
-
-year = '2020'
-month = '08'
+# shared row serializer lives with the fastapi-rds app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fastapi-rds', 'app'))
+from serialize import column_names, encode_ndjson, encode_rows, row_encoder
 
 DBHOST = os.environ.get('DBHOST')
 DBUSER = os.environ.get('DBUSER')
 DBPASS = os.environ.get('DBPASS')
 DB = "nem2p"
 
-db=MySQLdb.connect(host=DBHOST,user=DBUSER,passwd=DBPASS,db=DB)
+def connect():
+    # a fresh connection; each export worker opens its own
+    return MySQLdb.connect(host=DBHOST,user=DBUSER,passwd=DBPASS,db=DB)
+
+def month_range(year, month):
+    # half-open [first of month, first of next month); ValueError for months
+    # datetime can't bound (month outside 1-12, year 0, 9999-12)
+    start = datetime.datetime(year, month, 1)
+    try:
+        end = (start + datetime.timedelta(days=32)).replace(day=1)
+    except OverflowError:
+        raise ValueError(f"{year}-{month:02} is past the last month that can be queried") from None
+    return start, end
 
 def get_logistics(year: int, month: int):
-    query = f"SELECT * FROM logistics WHERE created_on LIKE '{year}-{month}-%' ORDER BY created_on;"
+    start, end = month_range(year, month)
+    query = "SELECT * FROM logistics WHERE created_on >= %s AND created_on < %s ORDER BY created_on;"
+    db=connect()
     c=db.cursor()
     try:
-        c.execute(query)
-        headers=[x[0] for x in c.description]
+        c.execute(query, (start, end))
+        headers=column_names(c.description)
         results = c.fetchall()
-        json_data=[]
-        for result in results:
-            json_data.append(dict(zip(headers,result)))
-        output = json.dumps(json_data, default = Decoder)
+        output = encode_rows(headers, results).decode('utf-8')
         print(output)
         return(output)
     except MySQLdb.Error as e:
@@ -45,16 +54,203 @@ def get_logistics(year: int, month: int):
         db.close()
 
 
+# where incremental runs remember how far they got, and where they append rows
+STATE_FILE = 'logistics.state.json'
+OUTPUT_FILE = 'logistics.ndjson'
+PAGE_SIZE = 5000
 
+def read_watermark(state_file):
+    # last (created_on, id) exported, or None before the first run
+    try:
+        with open(state_file) as f:
+            state = json.load(f)
+        return state['created_on'], state['id']
+    except FileNotFoundError:
+        return None
 
+def write_watermark(state_file, created_on, id):
+    # write to a temp file and rename so a crash never leaves a half-written state
+    tmp = state_file + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'created_on': created_on, 'id': id}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, state_file)
 
+def get_logistics_incremental(state_file=STATE_FILE, output_file=OUTPUT_FILE, page_size=PAGE_SIZE):
+    # Fetch only rows newer than the stored high-water mark, page by page with
+    # keyset pagination on (created_on, id), appending each page as NDJSON.
+    # The output is flushed before the watermark moves, so a crash can at worst
+    # repeat the last page on the next run, never skip rows.
+    watermark = read_watermark(state_file)
+    db=connect()
+    c=db.cursor()
+    total = 0
+    try:
+        with open(output_file, 'ab') as out:
+            while True:
+                if watermark is None:
+                    query = "SELECT * FROM logistics ORDER BY created_on, id LIMIT %s;"
+                    params = (page_size,)
+                else:
+                    # row comparison, so MySQL seeks straight to the watermark in
+                    # idx_logistics_created_on_id (logistics_created_on_id_index.sql)
+                    query = ("SELECT * FROM logistics WHERE (created_on, id) > (%s, %s) "
+                             "ORDER BY created_on, id LIMIT %s;")
+                    params = (watermark[0], watermark[1], page_size)
+                c.execute(query, params)
+                headers=column_names(c.description)
+                results = c.fetchall()
+                if not results:
+                    break
+                out.write(encode_ndjson(headers, results))
+                out.flush()
+                os.fsync(out.fileno())
+                last = results[-1]
+                watermark = (str(last[headers.index('created_on')]), last[headers.index('id')])
+                write_watermark(state_file, *watermark)
+                total += len(results)
+                if len(results) < page_size:
+                    break
+        print(f"exported {total} new rows to {output_file}")
+        return total
+    except MySQLdb.Error as e:
+        print("MySQL Error: ", str(e))
+        return None
+    finally:
+        c.close()
+        db.close()
 
 
-    c.close()
-    db.close()
-    return output
+# Partitioned export: one NDJSON file per month (or day) under
+#   <out>/year=2020/month=08/part.ndjson
+# written by a bounded pool of workers, each with its own connection.
+# <out>/_manifest.json records finished partitions so a rerun skips them.
+MANIFEST = '_manifest.json'
+FETCH_SIZE = 5000
+
+def partitions(start, end, by='month'):
+    # [(lo, hi, relative dir)] covering months/days from start up to end (exclusive)
+    parts = []
+    lo = start
+    while lo < end:
+        if by == 'day':
+            hi = lo + datetime.timedelta(days=1)
+            path = os.path.join(f"year={lo:%Y}", f"month={lo:%m}", f"day={lo:%d}")
+        else:
+            hi = month_range(lo.year, lo.month)[1]
+            path = os.path.join(f"year={lo:%Y}", f"month={lo:%m}")
+        parts.append((lo, min(hi, end), path))
+        lo = hi
+    return parts
+
+def export_partition(out_dir, lo, hi, path):
+    # stream one partition through a server-side cursor into part.ndjson;
+    # written under a temp name and renamed, so a file that exists is complete
+    target_dir = os.path.join(out_dir, path)
+    os.makedirs(target_dir, exist_ok=True)
+    target = os.path.join(target_dir, 'part.ndjson')
+    started = time.monotonic()
+    rows = 0
+    db=connect()
+    c=db.cursor(MySQLdb.cursors.SSCursor)
+    try:
+        c.execute("SELECT * FROM logistics WHERE created_on >= %s AND created_on < %s ORDER BY created_on;",
+                  (lo, hi))
+        encode = row_encoder(column_names(c.description))
+        with open(target + '.tmp', 'wb') as out:
+            while True:
+                results = c.fetchmany(FETCH_SIZE)
+                if not results:
+                    break
+                out.write("".join(encode(row) + "\n" for row in results).encode('utf-8'))
+                rows += len(results)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(target + '.tmp', target)
+    finally:
+        c.close()
+        db.close()
+    return {'rows': rows, 'bytes': os.path.getsize(target),
+            'seconds': round(time.monotonic() - started, 3)}
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'partitions': {}}
+
+def save_manifest(out_dir, manifest):
+    target = os.path.join(out_dir, MANIFEST)
+    with open(target + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(target + '.tmp', target)
+
+def export_logistics(start, end, out_dir='logistics', by='month', workers=4):
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    done = manifest['partitions']
+    todo = [p for p in partitions(start, end, by)
+            if p[2] not in done or not os.path.exists(os.path.join(out_dir, p[2], 'part.ndjson'))]
+    print(f"{len(todo)} partitions to export, {len(done)} already done")
+    failed = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(export_partition, out_dir, lo, hi, path): path for lo, hi, path in todo}
+        for future in concurrent.futures.as_completed(futures):
+            path = futures[future]
+            try:
+                done[path] = dict(future.result(), completed_on=datetime.datetime.now().isoformat())
+            except MySQLdb.Error as e:
+                print(f"{path}: MySQL Error: {e}")
+                failed.append(path)
+                continue
+            # record each partition as soon as it lands, so a crash loses nothing finished
+            save_manifest(out_dir, manifest)
+            print(f"{path}: {done[path]['rows']} rows")
+    if failed:
+        print(f"{len(failed)} partitions failed; rerun the same command to retry them")
+    return not failed
+
+def parse_month(value):
+    return datetime.datetime.strptime(value, "%Y-%m")
 
 
 # Run the script
 if __name__ == '__main__':
-    get_logistics(year,month)
+    parser = argparse.ArgumentParser(description="export logistics rows")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    month_cmd = commands.add_parser('month', help="print one month as a JSON array")
+    month_cmd.add_argument('year', type=int)
+    month_cmd.add_argument('month', type=int)
+
+    inc_cmd = commands.add_parser('incremental',
+                                  help="append only rows newer than the stored watermark as NDJSON")
+    inc_cmd.add_argument('--state', default=STATE_FILE)
+    inc_cmd.add_argument('--output', default=OUTPUT_FILE)
+    inc_cmd.add_argument('--page-size', type=int, default=PAGE_SIZE)
+
+    export_cmd = commands.add_parser('export', help="parallel partitioned export of a month range")
+    export_cmd.add_argument('start', type=parse_month, help="first month, YYYY-MM")
+    export_cmd.add_argument('end', type=parse_month, help="last month, YYYY-MM (inclusive)")
+    export_cmd.add_argument('--out', default='logistics')
+    export_cmd.add_argument('--by', choices=['month', 'day'], default='month')
+    export_cmd.add_argument('--workers', type=int, default=4)
+
+    args = parser.parse_args()
+    try:
+        if args.command == 'month':
+            month_range(args.year, args.month)
+        elif args.command == 'export':
+            month_range(args.end.year, args.end.month)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.command == 'month':
+        get_logistics(args.year, args.month)
+    elif args.command == 'incremental':
+        get_logistics_incremental(args.state, args.output, args.page_size)
+    else:
+        end = month_range(args.end.year, args.end.month)[1]
+        ok = export_logistics(args.start, end, args.out, args.by, args.workers)
+        sys.exit(0 if ok else 1)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+# $geoNear on the 2dsphere index vs. pulling every restaurant's coordinates and
+# filtering by haversine distance in Python:
+#
+#   python3 benchmarks/geo_near.py --queries 50 --max-meters 500
+
+import argparse
+import heapq
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database import get_restaurants  # noqa: E402
+from mongo_geo import near  # noqa: E402
+
+EARTH_RADIUS_M = 6371008.8
+
+
+def haversine_m(lng1, lat1, lng2, lat2):
+    lng1, lat1, lng2, lat2 = map(math.radians, (lng1, lat1, lng2, lat2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def naive_near(collection, lng, lat, max_meters, limit):
+    found = []
+    for doc in collection.find({}, {"name": 1, "address.coord": 1}):
+        coord = doc.get("address", {}).get("coord") or []
+        if len(coord) != 2:
+            continue
+        d = haversine_m(lng, lat, coord[0], coord[1])
+        if d <= max_meters:
+            found.append((d, doc["_id"]))
+    return heapq.nsmallest(limit, found, key=lambda pair: pair[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="$geoNear vs. naive distance filter")
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--max-meters', type=float, default=500)
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    collection = get_restaurants()
+    rnd = random.Random(5)
+    # points around Manhattan / Brooklyn, where sample_restaurants is dense
+    points = [(rnd.uniform(-74.02, -73.93), rnd.uniform(40.68, 40.80)) for _ in range(args.queries)]
+
+    for label, fn in [
+        ("naive scan", lambda p: naive_near(collection, p[0], p[1], args.max_meters, args.limit)),
+        ("$geoNear 2dsphere", lambda p: near(p[0], p[1], args.max_meters, limit=args.limit,
+                                             projection={"name": 1}, collection=collection)),
+    ]:
+        times = []
+        for p in points:
+            t = time.perf_counter()
+            fn(p)
+            times.append(time.perf_counter() - t)
+        times.sort()
+        print(f"{label:<18} median {1000 * times[len(times) // 2]:8.1f} ms  "
+              f"max {1000 * times[-1]:8.1f} ms  ({len(points)} queries)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+# Per-document insert_one (POST /hobbies) vs. chunked unordered bulk writes
+# (POST /hobbies/bulk) against a local mongod:
+#
+#   MONGO_URI=mongodb://localhost:27017 python3 benchmarks/hobbies_ingest.py --docs 20000
+#
+# Uses a scratch collection that is dropped before each run.
+
+import argparse
+import os
+import sys
+import time
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'mongo-api'))
+from chalicelib.hobbies import bulk_write_hobbies  # noqa: E402
+
+MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017')
+
+
+def make_hobbies(n):
+    return [{'name': f"hobby {i}", 'requires': ["time", f"gear {i % 50}"]} for i in range(n)]
+
+
+def per_doc(collection, items):
+    for item in items:
+        collection.insert_one({'name': item['name'], 'requires': item['requires']})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="per-doc vs. bulk hobby ingest")
+    parser.add_argument('--docs', type=int, default=20000)
+    parser.add_argument('--chunk', type=int, default=1000)
+    args = parser.parse_args()
+
+    client = MongoClient(MONGO_URI)
+    collection = client.bench.hobbies
+    items = make_hobbies(args.docs)
+    runs = [
+        ("insert_one per doc", lambda: per_doc(collection, items)),
+        ("bulk insert", lambda: bulk_write_hobbies(collection, items, chunk_size=args.chunk)),
+        ("bulk upsert by name", lambda: bulk_write_hobbies(collection, items, upsert=True,
+                                                           chunk_size=args.chunk)),
+    ]
+    for label, run in runs:
+        collection.drop()
+        # upserts look hobbies up by name, so give them an index like production should have
+        collection.create_index('name', unique=True)
+        t = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - t
+        print(f"{label:<20} {args.docs / elapsed:10,.0f} docs/s  ({elapsed:.2f}s)")
+    collection.drop()
+    client.close()
+
+
+if __name__ == '__main__':
+    main()
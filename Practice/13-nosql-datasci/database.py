@@ -1,7 +1,7 @@
-from pymongo import MongoClient, errors
-from bson.json_util import dumps
-import prettyprint as pprint
+from pymongo import MongoClient, monitoring
 import os
+import threading
+import time
 
 # mongopass = os.getenv('MONGOPASS')
 # uri = "mongodb+srv://cluster0.pguxs.mongodb.net/sample_restaurants"
@@ -9,8 +9,147 @@ import os
 # sampler = client.sample_restaurants
 # restaurants = sampler.restaurants
 
+# One shared MongoClient for every script. Nothing connects at import time:
+# the client is built on first use and then reused, with its own connection pool.
+# Point MONGO_URI at a local mongod (mongodb://localhost:27017) to work offline.
+MONGO_URI = os.getenv('MONGO_URI', "mongodb+srv://cluster0.pnxzwgz.mongodb.net/sample_restaurants")
+MONGO_USER = os.getenv('MONGO_USER', 'nmagee')
 mongopass = os.getenv('MONGOPASS')
-uri = "mongodb+srv://cluster0.pnxzwgz.mongodb.net/sample_restaurants"
-client = MongoClient(uri, username='nmagee', password=mongopass, connectTimeoutMS=200, retryWrites=True)
-sampler = client.sample_restaurants
-restaurants = sampler.restaurants
\ No newline at end of file
+# mongo_create/read/update/delete.py have always worked against this cluster
+# as this user; they pass it to use_cluster() so they keep doing so
+CRUD_CLUSTER = ("mongodb+srv://cluster0.pguxs.mongodb.net/sample_restaurants", "mongo")
+
+# pool and timeout settings, all overridable from the environment
+CLIENT_OPTIONS = {
+    "maxPoolSize": int(os.getenv('MONGO_MAX_POOL_SIZE', 50)),
+    "minPoolSize": int(os.getenv('MONGO_MIN_POOL_SIZE', 0)),
+    "maxIdleTimeMS": int(os.getenv('MONGO_MAX_IDLE_MS', 60000)),
+    # 200 ms was too tight for a TLS handshake to Atlas and failed spuriously
+    "connectTimeoutMS": int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 5000)),
+    "serverSelectionTimeoutMS": int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 10000)),
+    "waitQueueTimeoutMS": int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 5000)),
+    "retryWrites": True,
+}
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Counts connection pool events and times connection checkouts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = threading.local()
+        self.created = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.checked_in = 0
+        self.checkout_failed = 0
+        self.checkout_time = 0.0
+        self.max_checkout_time = 0.0
+
+    def _add(self, name, n=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add("created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add("closed")
+
+    def connection_check_out_started(self, event):
+        self._started.at = time.monotonic()
+
+    def connection_check_out_failed(self, event):
+        self._add("checkout_failed")
+
+    def connection_checked_out(self, event):
+        waited = time.monotonic() - getattr(self._started, "at", time.monotonic())
+        with self._lock:
+            self.checked_out += 1
+            self.checkout_time += waited
+            self.max_checkout_time = max(self.max_checkout_time, waited)
+
+    def connection_checked_in(self, event):
+        self._add("checked_in")
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "connections_open": self.created - self.closed,
+                "connections_created": self.created,
+                "in_use": self.checked_out - self.checked_in,
+                "checkouts": self.checked_out,
+                "checkout_failures": self.checkout_failed,
+                "avg_checkout_ms": round(1000 * self.checkout_time / self.checked_out, 3) if self.checked_out else 0.0,
+                "max_checkout_ms": round(1000 * self.max_checkout_time, 3),
+            }
+
+
+pool_metrics = PoolMetrics()
+_client = None
+_client_lock = threading.Lock()
+
+
+def use_cluster(uri, user):
+    # default the shared client to another cluster/user; MONGO_URI and
+    # MONGO_USER still win. Call before the client is first used.
+    global MONGO_URI, MONGO_USER
+    if _client is not None:
+        raise RuntimeError("the shared client is already connected")
+    MONGO_URI = os.getenv('MONGO_URI', uri)
+    MONGO_USER = os.getenv('MONGO_USER', user)
+
+
+def get_client():
+    # build the shared client on first call; later calls return the same one
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MongoClient(MONGO_URI, username=MONGO_USER if mongopass else None,
+                                      password=mongopass, event_listeners=[pool_metrics],
+                                      **CLIENT_OPTIONS)
+    return _client
+
+
+def get_restaurants():
+    return get_client().sample_restaurants.restaurants
+
+
+def close_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def metrics():
+    return dict(pool_metrics.snapshot(), options=CLIENT_OPTIONS)
+
+
+# the old module-level names still work, but only connect when first touched:
+# `database.restaurants`, `from database import client`
+def __getattr__(name):
+    if name == "client":
+        return get_client()
+    if name == "sampler":
+        return get_client().sample_restaurants
+    if name == "restaurants":
+        return get_restaurants()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
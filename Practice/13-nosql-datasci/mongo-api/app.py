@@ -1,36 +1,82 @@
-from chalice import Chalice, Response
+from chalice import BadRequestError, Chalice, ConflictError, Response
 import os
 import logging
 import bson
 import json
-from pymongo import MongoClient
-
-# Set up normal Mongo Atlas connection + db + collection
-mongopass = os.getenv('MONGOPASS')
-uri = "mongodb+srv://cluster0.pguxs.mongodb.net/things"
-client = MongoClient(uri, username='mongo', password=mongopass, connectTimeoutMS=200, retryWrites=True)
-db = client.things
-hobbies = db.hobbies
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import DuplicateKeyError
+from chalicelib import database
+from chalicelib.cache import hobbies_cache
+from chalicelib.hobbies import bulk_write_hobbies
 
 # Instantiate the Chalice app
 app = Chalice(app_name='mongo-api')
+# Chalice logs at ERROR by default; the per-request cache line is INFO
+app.log.setLevel(getattr(logging, os.getenv('LOG_LEVEL', 'INFO').upper(), logging.INFO))
 
 # A simple base route
 @app.route('/') # zone apex
 def index():
     return {'hello': 'world', "methods": ["GET","POST"], "endpoints": ["/hobbies"]}
 
-# get all hobbies
+# page sizes for GET /hobbies
+DEFAULT_LIMIT = int(os.getenv('HOBBIES_DEFAULT_LIMIT', 100))
+MAX_LIMIT = int(os.getenv('HOBBIES_MAX_LIMIT', 1000))
+
+# get hobbies, one page at a time: /hobbies?limit=100&after=<_id>
+# the next page's `after` value comes back in the X-Next-After header
 @app.route('/hobbies', methods=['GET'])
 def get_hobbies():
-    hobbies = db.hobbies.find({})
-    results = []
-    for hobby in hobbies:
-        output = {}
-        output['name'] = hobby['name']
-        output['requires']= hobby['requires']
-        results.append(output)
-    return results
+    params = app.current_request.query_params or {}
+    try:
+        limit = int(params.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise BadRequestError("limit must be an integer")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise BadRequestError(f"limit must be between 1 and {MAX_LIMIT}")
+    query = {}
+    if 'after' in params:
+        try:
+            query['_id'] = {'$gt': ObjectId(params['after'])}
+        except InvalidId:
+            raise BadRequestError("after must be a hobby _id")
+    db = database.get_db()
+
+    def load():
+        # keyset pagination on _id, only the fields we return, one extra to see if there's more
+        hobbies = (db.hobbies.find(query, {'name': 1, 'requires': 1})
+                   .sort('_id', 1)
+                   .limit(limit + 1)
+                   .batch_size(limit + 1))
+        results = []
+        last_id = None
+        more = False
+        for hobby in hobbies:
+            if len(results) == limit:
+                more = True
+                break
+            output = {}
+            output['name'] = hobby['name']
+            output['requires']= hobby['requires']
+            results.append(output)
+            last_id = hobby['_id']
+        return results, (str(last_id) if more else None)
+
+    # ?cache=false or Cache-Control: no-cache reads straight from Mongo
+    headers_in = app.current_request.headers or {}
+    bypass = (params.get('cache', 'true').lower() in ('0', 'false', 'no')
+              or 'no-cache' in headers_in.get('cache-control', '').lower())
+    (results, next_after), info = hobbies_cache.get_or_load(
+        db, (limit, params.get('after')), load, bypass=bypass)
+    app.log.info("GET /hobbies cache=%s %.1fms saved=%.1fms", info['cache'], info['ms'], info['saved_ms'])
+    headers = {
+        'X-Cache': info['cache'],
+        'X-Cache-Saved-Ms': f"{info['saved_ms']:.1f}",
+    }
+    if next_after:
+        headers['X-Next-After'] = next_after
+    return Response(body=results, headers=headers)
 
 # post a new hobby
 @app.route('/hobbies', methods=['POST'])
@@ -39,5 +85,43 @@ def post_hobbies():
     addthis = {}
     addthis['name'] = payload['name']
     addthis['requires'] = payload['requires']
-    hobbies = db.hobbies.insert_one(addthis)
-    return {"inserted": 200}
\ No newline at end of file
+    db = database.get_db()
+    try:
+        hobbies = db.hobbies.insert_one(addthis)
+    except DuplicateKeyError:
+        # names are unique once /hobbies/bulk?upsert=true has created the index
+        raise ConflictError(f"a hobby named {payload['name']!r} already exists")
+    hobbies_cache.bump(db)
+    return {"inserted": 200}
+
+# most hobbies accepted by one POST /hobbies/bulk request
+MAX_BULK = int(os.getenv('HOBBIES_MAX_BULK', 10000))
+
+# post many hobbies at once: a JSON array of {"name", "requires"} objects
+# ?upsert=true matches existing hobbies by name, so retries don't duplicate
+@app.route('/hobbies/bulk', methods=['POST'])
+def post_hobbies_bulk():
+    payload = app.current_request.json_body
+    if not isinstance(payload, list):
+        raise BadRequestError("body must be a JSON array of hobbies")
+    if len(payload) > MAX_BULK:
+        raise BadRequestError(f"at most {MAX_BULK} hobbies per request")
+    params = app.current_request.query_params or {}
+    upsert = params.get('upsert', 'false').lower() in ('1', 'true', 'yes')
+    db = database.get_db()
+    results = bulk_write_hobbies(db.hobbies, payload, upsert=upsert)
+    hobbies_cache.bump(db)
+    summary = {}
+    for result in results:
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+    return {"summary": summary, "results": results}
+
+# connection pool metrics for this container
+@app.route('/pool', methods=['GET'])
+def pool_metrics():
+    return database.metrics()
+
+# read-through cache metrics for this container
+@app.route('/cache', methods=['GET'])
+def cache_metrics():
+    return hobbies_cache.metrics()
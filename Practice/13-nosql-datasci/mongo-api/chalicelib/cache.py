@@ -0,0 +1,114 @@
+from collections import OrderedDict
+import os
+import threading
+import time
+from pymongo import ReturnDocument
+
+# Per-container read-through cache for GET /hobbies.
+#
+# Pages are kept in memory (LRU, CACHE_MAX_ENTRIES entries, CACHE_TTL seconds).
+# Every write bumps a version number stored in Mongo (things.cache_versions),
+# and cache keys include the version, so a write made through any container
+# retires every other container's cached pages as soon as they next read the
+# version. That read is one find_one by _id, done at most every
+# CACHE_VERSION_CHECK seconds, instead of the full page query.
+CACHE_TTL = float(os.getenv('CACHE_TTL', 60))
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 256))
+CACHE_VERSION_CHECK = float(os.getenv('CACHE_VERSION_CHECK', 1))
+VERSION_COLLECTION = 'cache_versions'
+
+
+class ReadThroughCache:
+    """LRU + TTL cache whose keys are scoped by a version stamp kept in Mongo."""
+
+    def __init__(self, name, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES,
+                 version_check=CACHE_VERSION_CHECK):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version_check = version_check
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_read_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.saved_ms = 0.0
+
+    def version(self, db):
+        # the current version stamp, re-read from Mongo when the local copy is stale
+        now = time.monotonic()
+        if self._version is None or now - self._version_read_at >= self.version_check:
+            doc = db[VERSION_COLLECTION].find_one({'_id': self.name})
+            self._set_version(doc['version'] if doc else 0, now)
+        return self._version
+
+    def _set_version(self, version, now):
+        with self._lock:
+            if version != self._version:
+                # older pages can never be asked for again
+                self._entries.clear()
+            self._version = version
+            self._version_read_at = now
+
+    def bump(self, db):
+        # call after every write; other containers notice within version_check seconds
+        doc = db[VERSION_COLLECTION].find_one_and_update(
+            {'_id': self.name}, {'$inc': {'version': 1}},
+            upsert=True, return_document=ReturnDocument.AFTER)
+        self._set_version(doc['version'], time.monotonic())
+        return doc['version']
+
+    def get_or_load(self, db, key, load, bypass=False):
+        """Return (value, info) for `key`, calling load() on a miss.
+
+        `info` has the outcome ('HIT', 'MISS' or 'BYPASS'), the time spent
+        here, and on a hit the load time that the hit saved.
+        """
+        start = time.perf_counter()
+        if bypass:
+            value = load()
+            with self._lock:
+                self.bypasses += 1
+            return value, {'cache': 'BYPASS', 'ms': 1000 * (time.perf_counter() - start), 'saved_ms': 0.0}
+        key = (self.version(db),) + tuple(key)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                elapsed = 1000 * (time.perf_counter() - start)
+                saved = max(entry[2] - elapsed, 0.0)
+                self.saved_ms += saved
+                return entry[1], {'cache': 'HIT', 'ms': elapsed, 'saved_ms': saved}
+            self.misses += 1
+        load_start = time.perf_counter()
+        value = load()
+        load_ms = 1000 * (time.perf_counter() - load_start)
+        with self._lock:
+            self._entries[key] = (now + self.ttl, value, load_ms)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value, {'cache': 'MISS', 'ms': 1000 * (time.perf_counter() - start), 'saved_ms': 0.0}
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'version': self._version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'bypasses': self.bypasses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'saved_ms': round(self.saved_ms, 3),
+                'ttl': self.ttl,
+                'max_entries': self.max_entries,
+                'version_check': self.version_check,
+            }
+
+
+hobbies_cache = ReadThroughCache('hobbies')
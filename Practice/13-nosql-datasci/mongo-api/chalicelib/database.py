@@ -0,0 +1,114 @@
+from pymongo import MongoClient, monitoring
+import os
+import threading
+import time
+
+# Shared MongoClient for the API. Chalice only packages app.py and chalicelib/,
+# so this mirrors ../database.py. The client is built on the first request a
+# container serves and reused by every warm invocation after that.
+MONGO_URI = os.getenv('MONGO_URI', "mongodb+srv://cluster0.pguxs.mongodb.net/things")
+MONGO_USER = os.getenv('MONGO_USER', 'mongo')
+mongopass = os.getenv('MONGOPASS')
+
+# a Lambda container serves one request at a time, so a small pool is plenty
+CLIENT_OPTIONS = {
+    "maxPoolSize": int(os.getenv('MONGO_MAX_POOL_SIZE', 5)),
+    "minPoolSize": int(os.getenv('MONGO_MIN_POOL_SIZE', 0)),
+    "maxIdleTimeMS": int(os.getenv('MONGO_MAX_IDLE_MS', 60000)),
+    "connectTimeoutMS": int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 5000)),
+    "serverSelectionTimeoutMS": int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 10000)),
+    "waitQueueTimeoutMS": int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 5000)),
+    "retryWrites": True,
+}
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Counts connection pool events and times connection checkouts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = threading.local()
+        self.created = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.checked_in = 0
+        self.checkout_failed = 0
+        self.checkout_time = 0.0
+        self.max_checkout_time = 0.0
+
+    def _add(self, name, n=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add("created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add("closed")
+
+    def connection_check_out_started(self, event):
+        self._started.at = time.monotonic()
+
+    def connection_check_out_failed(self, event):
+        self._add("checkout_failed")
+
+    def connection_checked_out(self, event):
+        waited = time.monotonic() - getattr(self._started, "at", time.monotonic())
+        with self._lock:
+            self.checked_out += 1
+            self.checkout_time += waited
+            self.max_checkout_time = max(self.max_checkout_time, waited)
+
+    def connection_checked_in(self, event):
+        self._add("checked_in")
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "connections_open": self.created - self.closed,
+                "connections_created": self.created,
+                "in_use": self.checked_out - self.checked_in,
+                "checkouts": self.checked_out,
+                "checkout_failures": self.checkout_failed,
+                "avg_checkout_ms": round(1000 * self.checkout_time / self.checked_out, 3) if self.checked_out else 0.0,
+                "max_checkout_ms": round(1000 * self.max_checkout_time, 3),
+            }
+
+
+pool_metrics = PoolMetrics()
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MongoClient(MONGO_URI, username=MONGO_USER if mongopass else None,
+                                      password=mongopass, event_listeners=[pool_metrics],
+                                      **CLIENT_OPTIONS)
+    return _client
+
+
+def get_db():
+    return get_client().things
+
+
+def metrics():
+    return dict(pool_metrics.snapshot(), options=CLIENT_OPTIONS)
@@ -0,0 +1,106 @@
+import logging
+import threading
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+
+log = logging.getLogger(__name__)
+
+# operations per bulk_write call; the driver splits further at 100,000 ops / 48 MB
+CHUNK_SIZE = 1000
+DUPLICATE_KEY = 11000
+
+_name_index_ready = False
+_name_index_lock = threading.Lock()
+
+
+def ensure_name_index(collection):
+    # Upserts by name are only idempotent if names are unique: without the
+    # index, a retry racing the original request can insert a second copy.
+    # Created once per container; create_index is a no-op if it already exists.
+    global _name_index_ready
+    if _name_index_ready:
+        return
+    with _name_index_lock:
+        if _name_index_ready:
+            return
+        try:
+            collection.create_index('name', unique=True)
+        except OperationFailure as e:
+            # most likely duplicate names already stored; upserts still work,
+            # just without the race protection until they are cleaned up
+            log.error("can't create unique index on hobbies.name: %s", e)
+        _name_index_ready = True
+
+
+def hobby_doc(item):
+    # validated {'name', 'requires'} document, or None if the item is unusable
+    if not isinstance(item, dict) or 'name' not in item or 'requires' not in item:
+        return None
+    return {'name': item['name'], 'requires': item['requires']}
+
+
+def bulk_write_hobbies(collection, items, upsert=False, chunk_size=CHUNK_SIZE):
+    """Write many hobbies with unordered bulk_write calls of `chunk_size` ops.
+
+    With `upsert`, each hobby replaces the fields of any existing hobby with the
+    same name (or is inserted), so a retried request doesn't create duplicates;
+    the unique name index (ensure_name_index) makes that hold for concurrent
+    retries too. Returns one result dict per input item, in input order.
+    """
+    if upsert:
+        ensure_name_index(collection)
+    results = [None] * len(items)
+    ops = []
+    positions = []
+    ids = []
+    for i, item in enumerate(items):
+        doc = hobby_doc(item)
+        if doc is None:
+            results[i] = {'index': i, 'status': 'invalid', 'error': "name and requires are required"}
+            continue
+        if upsert:
+            ops.append(UpdateOne({'name': doc['name']}, {'$set': doc}, upsert=True))
+        else:
+            # assign the _id here so it can be reported back per item
+            doc['_id'] = ObjectId()
+            ops.append(InsertOne(doc))
+        positions.append(i)
+        ids.append(doc.get('_id'))
+
+    for start in range(0, len(ops), chunk_size):
+        chunk = ops[start:start + chunk_size]
+        try:
+            details = collection.bulk_write(chunk, ordered=False).bulk_api_result
+        except BulkWriteError as e:
+            # unordered: everything except the listed writeErrors was applied
+            details = e.details
+        errors = {err['index']: err for err in details.get('writeErrors', [])}
+        upserted = {u['index']: u['_id'] for u in details.get('upserted', [])}
+        if upsert:
+            # a concurrent upsert inserted the same name first; run these again
+            # so they update the document that won
+            raced = [j for j, err in errors.items() if err.get('code') == DUPLICATE_KEY]
+            if raced:
+                try:
+                    retry = collection.bulk_write([chunk[j] for j in raced], ordered=False).bulk_api_result
+                except BulkWriteError as e:
+                    retry = e.details
+                failed = {err['index']: err for err in retry.get('writeErrors', [])}
+                for n, j in enumerate(raced):
+                    if n in failed:
+                        errors[j] = failed[n]
+                    else:
+                        del errors[j]
+        for j, i in enumerate(positions[start:start + chunk_size]):
+            _id = ids[start + j]
+            if j in errors:
+                results[i] = {'index': i, 'status': 'error', 'error': errors[j].get('errmsg')}
+            elif upsert:
+                if j in upserted:
+                    results[i] = {'index': i, 'status': 'inserted', '_id': str(upserted[j])}
+                else:
+                    results[i] = {'index': i, 'status': 'updated'}
+            else:
+                results[i] = {'index': i, 'status': 'inserted', '_id': str(_id)}
+    return results
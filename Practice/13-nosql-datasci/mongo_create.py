@@ -1,15 +1,14 @@
 #!/usr/bin/env python3
 
-from pymongo import MongoClient, errors
 from bson.json_util import dumps
 import prettyprint as pprint
-import os
+from database import CRUD_CLUSTER, get_restaurants, use_cluster
+from restaurant_analytics import create_restaurant
 
-mongopass = os.getenv('MONGOPASS')
-uri = "mongodb+srv://cluster0.pguxs.mongodb.net/sample_restaurants"
-client = MongoClient(uri, username='mongo', password=mongopass, connectTimeoutMS=200, retryWrites=True)
-sampler = client.sample_restaurants
-restaurants = sampler.restaurants
+# shared, lazily created client (see database.py), on the cluster these
+# scripts have always used unless MONGO_URI/MONGO_USER say otherwise
+use_cluster(*CRUD_CLUSTER)
+restaurants = get_restaurants()
 
 new_record = {
     "address": {
@@ -26,8 +25,8 @@ new_record = {
     "name": "Papa Gina's Classy Kitchen"
 }
 
-# Insert a single record
-restaurants.insert_one(new_record)
+# Insert a single record (and clear cached analytics)
+create_restaurant(new_record)
 
 get_record = restaurants.find({"name":"Papa Gina's Classy Kitchen"})
 print(dumps(get_record, indent=2))
\ No newline at end of file
@@ -1,21 +1,20 @@
 #!/usr/bin/env python3
 
-from pymongo import MongoClient, errors
 from bson.json_util import dumps
 import prettyprint as pprint
-import os
+from database import CRUD_CLUSTER, get_restaurants, use_cluster
+from restaurant_analytics import delete_restaurant
 
-mongopass = os.getenv('MONGOPASS')
-uri = "mongodb+srv://cluster0.pguxs.mongodb.net/sample_restaurants"
-client = MongoClient(uri, username='mongo', password=mongopass, connectTimeoutMS=200, retryWrites=True)
-sampler = client.sample_restaurants
-restaurants = sampler.restaurants
+# shared, lazily created client (see database.py), on the cluster these
+# scripts have always used unless MONGO_URI/MONGO_USER say otherwise
+use_cluster(*CRUD_CLUSTER)
+restaurants = get_restaurants()
 
 get_record = restaurants.find({"name":"Papa Gina's Classy Kitchen"})
 print(dumps(get_record, indent=2))
 
 # Deletes first one it finds matching criteria
-restaurants.delete_one({"name":"Papa Gina's Classy Kitchen"})
+delete_restaurant({"name":"Papa Gina's Classy Kitchen"})
 
 # Deletes all documents found matching criteria
-# restaurants.delete_many()
+# delete_restaurant(query, many=True)
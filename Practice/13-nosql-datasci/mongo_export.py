@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+
+# Stream query results out of MongoDB in constant memory.
+#
+#   python3 mongo_export.py --filter '{"borough": "Brooklyn"}' > brooklyn.ndjson
+#   python3 mongo_export.py --format csv --fields name,cuisine,address.zipcode,address.coord -o r.csv
+#   python3 mongo_export.py --format bson --gzip --parallel 4 -o restaurants.bson.gz
+#
+# Documents are written as the cursor hands them over, batch by batch, so memory
+# stays flat even for full-collection dumps. --parallel splits the collection
+# into _id ranges, exports each range on its own thread into a temporary part,
+# then concatenates the parts in _id order (gzip members concatenate cleanly).
+
+import argparse
+import concurrent.futures
+import csv
+import gzip
+import io
+import os
+import shutil
+import sys
+import tempfile
+from bson import RawBSONDocument
+from bson.codec_options import CodecOptions
+from bson.json_util import dumps, loads
+from database import get_restaurants
+
+BATCH_SIZE = 1000
+FORMATS = ("ndjson", "csv", "bson")
+
+
+def flatten(doc, prefix=""):
+    # {"address": {"coord": [-73.9, 40.7]}} -> {"address.coord.0": -73.9, "address.coord.1": 40.7}
+    # lists of documents (like grades) stay together as one JSON string
+    out = {}
+    for key, value in doc.items():
+        name = prefix + key
+        if isinstance(value, dict):
+            out.update(flatten(value, name + "."))
+        elif isinstance(value, list) and not any(isinstance(v, (dict, list)) for v in value):
+            for i, v in enumerate(value):
+                out[f"{name}.{i}"] = v
+        elif isinstance(value, (dict, list)):
+            out[name] = dumps(value)
+        else:
+            out[name] = value
+    return out
+
+
+def expand_fields(fields, sample):
+    # turn "address.coord" into the flattened columns it produces in the sample doc
+    columns = []
+    for field in fields:
+        matches = [k for k in sample if k == field or k.startswith(field + ".")]
+        columns.extend(matches or [field])
+    return columns
+
+
+def open_output(path, use_gzip):
+    raw = sys.stdout.buffer if path in (None, "-") else open(path, "wb")
+    if use_gzip:
+        return gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6), raw
+    return raw, raw
+
+
+def write_docs(cursor, out, fmt, fields=None, write_header=True):
+    # write every document from `cursor` to the binary stream `out`; returns the count
+    n = 0
+    if fmt == "bson":
+        for doc in cursor:
+            out.write(doc.raw)
+            n += 1
+        return n
+    if fmt == "ndjson":
+        buf = []
+        for doc in cursor:
+            buf.append(dumps(doc))
+            n += 1
+            if len(buf) >= BATCH_SIZE:
+                out.write(("\n".join(buf) + "\n").encode("utf-8"))
+                buf = []
+        if buf:
+            out.write(("\n".join(buf) + "\n").encode("utf-8"))
+        return n
+    # csv: columns come from --fields, or from the first document
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=False)
+    writer = None
+    for doc in cursor:
+        row = flatten(doc)
+        if writer is None:
+            columns = expand_fields(fields, row) if fields else list(row)
+            writer = csv.DictWriter(text, fieldnames=columns, extrasaction="ignore")
+            if write_header:
+                writer.writeheader()
+        writer.writerow(row)
+        n += 1
+    text.flush()
+    text.detach()
+    return n
+
+
+def make_cursor(collection, query, projection, fmt, batch_size, id_range=None):
+    if fmt == "bson":
+        # hand back undecoded BSON bytes, no per-document Python objects
+        collection = collection.with_options(codec_options=CodecOptions(document_class=RawBSONDocument))
+    if id_range is not None:
+        lo, hi = id_range
+        bounds = {}
+        if lo is not None:
+            bounds["$gte"] = lo
+        if hi is not None:
+            bounds["$lt"] = hi
+        if bounds:
+            query = {"$and": [query, {"_id": bounds}]}
+    cursor = collection.find(query, projection, batch_size=batch_size)
+    if id_range is not None:
+        cursor = cursor.sort("_id", 1)
+    return cursor
+
+
+def split_points(collection, query, parts):
+    # approximate _id quantiles from a random sample of matching documents
+    sample = [d["_id"] for d in collection.aggregate([
+        {"$match": query}, {"$sample": {"size": parts * 100}}, {"$project": {"_id": 1}}])]
+    sample.sort()
+    if len(sample) < parts:
+        return [None, None]
+    bounds = [sample[len(sample) * i // parts] for i in range(1, parts)]
+    return [None] + bounds + [None]
+
+
+def export(collection, query, out_path=None, fmt="ndjson", projection=None, fields=None,
+           batch_size=BATCH_SIZE, use_gzip=False, parallel=1):
+    if fmt == "csv" and fields and projection is None:
+        projection = {f: 1 for f in fields}
+    out, raw = open_output(out_path, use_gzip)
+    try:
+        if parallel <= 1:
+            return write_docs(make_cursor(collection, query, projection, fmt, batch_size), out, fmt, fields)
+        if fmt == "csv" and not fields:
+            # every part must write the same columns: take them from one document up front
+            first = collection.find_one(query, projection)
+            fields = list(flatten(first)) if first else []
+        points = split_points(collection, query, parallel)
+        ranges = list(zip(points[:-1], points[1:]))
+        with tempfile.TemporaryDirectory() as tmp:
+            def run(i):
+                path = os.path.join(tmp, f"part-{i:04}")
+                part, part_raw = open_output(path, use_gzip)
+                try:
+                    cursor = make_cursor(collection, query, projection, fmt, batch_size, ranges[i])
+                    # only the first part carries the CSV header
+                    return write_docs(cursor, part, fmt, fields, write_header=(i == 0)), path
+                finally:
+                    part.close()
+                    if part_raw is not part:
+                        part_raw.close()
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers=parallel) as pool:
+                done = list(pool.map(run, range(len(ranges))))
+            if use_gzip:
+                # write the gzip parts as-is after the (empty) leading member
+                out.close()
+                out = raw
+            total = 0
+            for n, path in done:
+                with open(path, "rb") as f:
+                    shutil.copyfileobj(f, out, 1024 * 1024)
+                total += n
+            return total
+    finally:
+        if out is not raw:
+            out.close()
+        if raw is not sys.stdout.buffer:
+            raw.close()
+        else:
+            raw.flush()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="stream MongoDB query results to a file")
+    parser.add_argument('--filter', default='{}', help="query as (extended) JSON")
+    parser.add_argument('--fields', help="comma-separated fields to project / CSV columns")
+    parser.add_argument('--format', choices=FORMATS, default='ndjson')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--gzip', action='store_true')
+    parser.add_argument('--parallel', type=int, default=1, help="export _id ranges on this many threads")
+    parser.add_argument('-o', '--output', default='-', help="file to write, - for stdout")
+    args = parser.parse_args()
+
+    fields = args.fields.split(",") if args.fields else None
+    projection = {f: 1 for f in fields} if fields else None
+    n = export(get_restaurants(), loads(args.filter), args.output, args.format, projection, fields,
+               args.batch_size, args.gzip, args.parallel)
+    print(f"exported {n} documents", file=sys.stderr)
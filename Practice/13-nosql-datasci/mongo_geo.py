@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+# "Nearby" restaurant lookups backed by the address.coord 2dsphere index.
+#
+#   python3 mongo_geo.py -73.976 40.786 --max-meters 500 --cuisine Italian --limit 5
+
+import argparse
+from bson.json_util import dumps
+from database import get_restaurants
+from mongo_indexes import ensure_indexes
+
+DEFAULT_PROJECTION = {"name": 1, "cuisine": 1, "borough": 1, "address": 1}
+
+
+def near(lng, lat, max_meters, cuisine=None, limit=10, projection=DEFAULT_PROJECTION, collection=None):
+    # restaurants within max_meters of (lng, lat), nearest first, each with
+    # a `distance_m` field; $geoNear needs the 2dsphere index from mongo_indexes.py
+    collection = collection if collection is not None else get_restaurants()
+    geo_near = {
+        "near": {"type": "Point", "coordinates": [lng, lat]},
+        "distanceField": "distance_m",
+        "maxDistance": max_meters,
+        "spherical": True,
+        "key": "address.coord",
+    }
+    if cuisine:
+        geo_near["query"] = {"cuisine": cuisine}
+    pipeline = [{"$geoNear": geo_near}, {"$limit": limit}]
+    if projection:
+        pipeline.append({"$project": dict(projection, distance_m=1)})
+    return list(collection.aggregate(pipeline))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="find restaurants near a point")
+    parser.add_argument('lng', type=float)
+    parser.add_argument('lat', type=float)
+    parser.add_argument('--max-meters', type=float, default=1000)
+    parser.add_argument('--cuisine')
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--create-index', action='store_true', help="create the indexes first")
+    args = parser.parse_args()
+
+    if args.create_index:
+        ensure_indexes(get_restaurants())
+    print(dumps(near(args.lng, args.lat, args.max_meters, args.cuisine, args.limit), indent=2))
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+# Indexes for sample_restaurants.restaurants, and the queries that rely on them.
+#
+#   python3 mongo_indexes.py create    # create any missing indexes
+#   python3 mongo_indexes.py stats     # every count in one round trip
+#   python3 mongo_indexes.py explain   # show which index each query uses
+
+import argparse
+import json
+from pymongo import ASCENDING, GEOSPHERE, IndexModel
+from database import get_restaurants
+
+# The (borough, cuisine) index also serves borough-only filters through its
+# prefix, so there is no separate borough index.
+INDEXES = [
+    IndexModel([("borough", ASCENDING), ("cuisine", ASCENDING)], name="borough_cuisine"),
+    IndexModel([("cuisine", ASCENDING)], name="cuisine"),
+    IndexModel([("name", ASCENDING)], name="name"),
+    # address.coord holds legacy [lng, lat] pairs; needed by $geoNear (mongo_geo.py)
+    IndexModel([("address.coord", GEOSPHERE)], name="address_coord_2dsphere"),
+]
+
+
+def ensure_indexes(collection):
+    # create_indexes is a no-op for indexes that already exist with the same spec
+    return collection.create_indexes(INDEXES)
+
+
+def stats_pipeline(cuisine, borough):
+    # The leading $match can use the cuisine and borough_cuisine indexes, so
+    # $facet only sees documents that count toward at least one total.
+    return [
+        {"$match": {"$or": [{"cuisine": cuisine}, {"borough": borough}]}},
+        {"$facet": {
+            "cuisine": [{"$match": {"cuisine": cuisine}}, {"$count": "n"}],
+            "borough": [{"$match": {"borough": borough}}, {"$count": "n"}],
+            "borough_cuisine": [{"$match": {"borough": borough, "cuisine": cuisine}}, {"$count": "n"}],
+        }},
+    ]
+
+
+def stats(collection, cuisine="Italian", borough="Brooklyn"):
+    # total from collection metadata, everything else from a single aggregation
+    facets = next(collection.aggregate(stats_pipeline(cuisine, borough)))
+    counts = {key: (value[0]["n"] if value else 0) for key, value in facets.items()}
+    return {
+        "total": collection.estimated_document_count(),
+        f"cuisine={cuisine}": counts["cuisine"],
+        f"borough={borough}": counts["borough"],
+        f"borough={borough},cuisine={cuisine}": counts["borough_cuisine"],
+    }
+
+
+def plan_stages(plan):
+    # flatten a winning plan into "STAGE(index)" strings, outermost first
+    stages = []
+    pending = [plan]
+    while pending:
+        node = pending.pop(0)
+        stage = node.get("stage", "?")
+        if "indexName" in node:
+            stage += f"({node['indexName']})"
+        stages.append(stage)
+        if "inputStage" in node:
+            pending.append(node["inputStage"])
+        pending.extend(node.get("inputStages", []))
+    return stages
+
+
+def winning_plan(explain):
+    # find/count explains keep queryPlanner at the top; aggregations nest it in stages
+    planner = explain.get("queryPlanner")
+    for stage in explain.get("stages", []):
+        if "$cursor" in stage:
+            planner = stage["$cursor"]["queryPlanner"]
+    if planner is None:
+        return {}
+    plan = planner["winningPlan"]
+    # the slot-based engine (MongoDB 5+) wraps the classic plan tree in queryPlan
+    return plan.get("queryPlan", plan)
+
+
+def explain_queries(collection, cuisine="Italian", borough="Brooklyn"):
+    db = collection.database
+    name = collection.name
+    checks = {
+        "find name": db.command("explain", {"find": name, "filter": {"name": "Papa Gina's Classy Kitchen"}}),
+        "find borough": db.command("explain", {"find": name, "filter": {"borough": borough}}),
+        "count cuisine": db.command("explain", {"count": name, "query": {"cuisine": cuisine}}),
+        "count borough": db.command("explain", {"count": name, "query": {"borough": borough}}),
+        "stats $facet": db.command("explain", {"aggregate": name,
+                                               "pipeline": stats_pipeline(cuisine, borough),
+                                               "cursor": {}}),
+    }
+    report = {}
+    for label, explain in checks.items():
+        stages = plan_stages(winning_plan(explain))
+        report[label] = {
+            "uses_index": any("IXSCAN" in s or "COUNT_SCAN" in s for s in stages),
+            "plan": " <- ".join(stages),
+        }
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="restaurant index management")
+    parser.add_argument('command', choices=['create', 'stats', 'explain'])
+    args = parser.parse_args()
+
+    restaurants = get_restaurants()
+    if args.command == 'create':
+        print("indexes:", ensure_indexes(restaurants))
+    elif args.command == 'stats':
+        print(json.dumps(stats(restaurants), indent=2))
+    else:
+        print(json.dumps(explain_queries(restaurants), indent=2))
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+
+# Exercise the shared client in database.py against a local mongod:
+#
+#   MONGO_URI=mongodb://localhost:27017 python3 mongo_pool_check.py --threads 32
+#
+# Shows that importing database.py costs nothing, that the first call pays for
+# the connection, and what the pool did under concurrent load.
+
+import argparse
+import concurrent.futures
+import json
+import time
+
+t = time.perf_counter()
+import database  # noqa: E402
+import_ms = 1000 * (time.perf_counter() - t)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="shared MongoClient pool check")
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"import database: {import_ms:.1f} ms")
+    t = time.perf_counter()
+    database.get_client().admin.command('ping')
+    print(f"first ping (connects): {1000 * (time.perf_counter() - t):.1f} ms")
+
+    restaurants = database.get_restaurants()
+    t = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(args.threads) as ex:
+        list(ex.map(lambda _: restaurants.find_one({}, {"_id": 1}), range(args.requests)))
+    elapsed = time.perf_counter() - t
+    print(f"{args.requests} find_one calls on {args.threads} threads: {args.requests / elapsed:,.0f}/s")
+    print(json.dumps(database.metrics(), indent=2))
+    database.close_client()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
 
-from pymongo import MongoClient, errors
-import os
-from database import *
+from database import get_client
+from mongo_indexes import ensure_indexes, stats as facet_stats
 
 # mongopass = os.getenv('MONGOPASS')
 # uri = "mongodb+srv://cluster0.pnxzwgz.mongodb.net/sample_restaurants"
 # client = MongoClient(uri, username='nmagee', password=mongopass, connectTimeoutMS=200, retryWrites=True)
 
+client = get_client()
+
 stats = client.stats
 print(stats)
 
@@ -19,7 +20,10 @@ colls = thisdb.list_collection_names()
 print(colls)
 
 restaurants = thisdb.restaurants
-count = restaurants.count_documents({})
-print(count, "restaurants")
-italian = restaurants.count_documents({'cuisine': 'Italian'})
-print(italian, "Italian restaurants")
+# make sure the indexes the counts below rely on exist
+ensure_indexes(restaurants)
+# all counts in one aggregation; the total comes from collection metadata
+counts = facet_stats(restaurants)
+print(counts["total"], "restaurants")
+print(counts["cuisine=Italian"], "Italian restaurants")
+print(counts["borough=Brooklyn"], "Brooklyn restaurants")
@@ -1,26 +1,25 @@
 #!/usr/bin/env python3
 
-from pymongo import MongoClient, errors
 from bson.json_util import dumps
 import prettyprint as pprint
-import os
+from database import CRUD_CLUSTER, get_restaurants, use_cluster
+from restaurant_analytics import update_restaurant
 
-mongopass = os.getenv('MONGOPASS')
-uri = "mongodb+srv://cluster0.pguxs.mongodb.net/sample_restaurants"
-client = MongoClient(uri, username='mongo', password=mongopass, connectTimeoutMS=200, retryWrites=True)
-sampler = client.sample_restaurants
-restaurants = sampler.restaurants
+# shared, lazily created client (see database.py), on the cluster these
+# scripts have always used unless MONGO_URI/MONGO_USER say otherwise
+use_cluster(*CRUD_CLUSTER)
+restaurants = get_restaurants()
 
 # Updates a single record - the first matching criteria
 # using the $set operator
-restaurants.update_one({"name": "Mama Gina's Classy Kitchen"}, {"$set": {"freshness_factor":"8"}})
+update_restaurant({"name": "Mama Gina's Classy Kitchen"}, {"$set": {"freshness_factor":"8"}})
 
 # Update a single record - add tags
 # using the $push operator
-restaurants.update_one({"name": "Mama Gina's Classy Kitchen"}, {"$push": {"tagz":"fancy"}})
+update_restaurant({"name": "Mama Gina's Classy Kitchen"}, {"$push": {"tagz":"fancy"}})
 
 # Updates several records - all matching criteria
-# restaurants.update_many(new_record)
+# update_restaurant(query, update, many=True)
 
 # The full list of mongodb operators is here:
 # https://docs.mongodb.com/manual/reference/operator/
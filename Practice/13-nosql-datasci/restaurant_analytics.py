@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+
+# Grouped counts and top-N breakdowns of restaurants, computed by aggregation
+# pipelines on the server and cached for CACHE_TTL seconds.
+#
+#   python3 restaurant_analytics.py counts borough
+#   python3 restaurant_analytics.py top cuisine --by address.zipcode --n 3
+#
+# Writes that go through create_restaurant / update_restaurant /
+# delete_restaurant (as mongo_create.py, mongo_update.py and mongo_delete.py do)
+# bump a version number stored in Mongo (cache_versions, _id
+# "restaurant_analytics"). Cache keys include the version, so a write made by
+# any process retires every process's cached results once they next read it;
+# that read is one find_one by _id, done at most every ANALYTICS_VERSION_CHECK
+# seconds.
+
+import argparse
+import json
+import os
+import threading
+import time
+from pymongo import ReturnDocument
+from database import get_restaurants
+
+CACHE_TTL = float(os.getenv('ANALYTICS_CACHE_TTL', 300))
+VERSION_CHECK = float(os.getenv('ANALYTICS_VERSION_CHECK', 1))
+VERSION_COLLECTION = 'cache_versions'
+VERSION_ID = 'restaurant_analytics'
+GROUP_FIELDS = ("borough", "cuisine", "address.zipcode")
+
+_cache = {}
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "invalidations": 0, "pipelines": {}}
+# shared version stamp as last read from Mongo, and when
+_version = {"value": None, "read_at": 0.0}
+# bumped on every invalidation; a result computed across a bump is not cached
+_generation = 0
+
+
+def _versions():
+    return get_restaurants().database[VERSION_COLLECTION]
+
+
+def _set_version(version, changed=False):
+    # changed=True: this process just wrote, so drop its cache even if no one
+    # else has noticed the new version yet
+    global _generation
+    with _lock:
+        _version["read_at"] = time.monotonic()
+        previous = _version["value"]
+        if previous is None or version > previous:
+            _version["value"] = version
+            # someone wrote since we last looked
+            changed = changed or previous is not None
+        if changed:
+            _cache.clear()
+            _generation += 1
+            _stats["invalidations"] += 1
+
+
+def _current_version():
+    # the shared version stamp, re-read from Mongo when the local copy is stale
+    if _version["value"] is None or time.monotonic() - _version["read_at"] >= VERSION_CHECK:
+        doc = _versions().find_one({"_id": VERSION_ID})
+        _set_version(doc["version"] if doc else 0)
+    return _version["value"]
+
+
+def _cached(key, pipeline):
+    version = _current_version()
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get((version,) + key)
+        if entry is not None and entry[0] > now:
+            _stats["hits"] += 1
+            return entry[1]
+        _stats["misses"] += 1
+        generation = _generation
+    start = time.perf_counter()
+    result = list(get_restaurants().aggregate(pipeline))
+    elapsed = time.perf_counter() - start
+    with _lock:
+        timing = _stats["pipelines"].setdefault(key[0], {"runs": 0, "total_ms": 0.0, "last_ms": 0.0})
+        timing["runs"] += 1
+        timing["total_ms"] += 1000 * elapsed
+        timing["last_ms"] = 1000 * elapsed
+        # an invalidate() while the pipeline ran may have made this result stale
+        if generation == _generation:
+            _cache[(version,) + key] = (time.monotonic() + CACHE_TTL, result)
+    return result
+
+
+def _check_field(field):
+    if field not in GROUP_FIELDS:
+        raise ValueError(f"can only group by {', '.join(GROUP_FIELDS)}")
+
+
+def counts_by(field):
+    # [{"_id": <value>, "n": <restaurants>}, ...], largest first
+    _check_field(field)
+    pipeline = [
+        {"$group": {"_id": f"${field}", "n": {"$sum": 1}}},
+        {"$sort": {"n": -1, "_id": 1}},
+    ]
+    return _cached(("counts_by", field), pipeline)
+
+
+def top_n(field, by, n=5):
+    # the n most common values of `field` within each value of `by`,
+    # e.g. top_n("cuisine", by="address.zipcode") -> top cuisines per zipcode
+    _check_field(field)
+    _check_field(by)
+    pipeline = [
+        {"$group": {"_id": {"group": f"${by}", "value": f"${field}"}, "n": {"$sum": 1}}},
+        {"$sort": {"_id.group": 1, "n": -1, "_id.value": 1}},
+        {"$group": {"_id": "$_id.group", "top": {"$push": {"value": "$_id.value", "n": "$n"}}}},
+        {"$project": {"top": {"$slice": ["$top", n]}}},
+        {"$sort": {"_id": 1}},
+    ]
+    return _cached(("top_n", field, by, n), pipeline)
+
+
+def invalidate():
+    # bump the shared version: this process's cache is cleared now, every other
+    # process's within VERSION_CHECK seconds
+    doc = _versions().find_one_and_update(
+        {"_id": VERSION_ID}, {"$inc": {"version": 1}},
+        upsert=True, return_document=ReturnDocument.AFTER)
+    _set_version(doc["version"], changed=True)
+
+
+def metrics():
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            "entries": len(_cache),
+            "version": _version["value"],
+            "hits": _stats["hits"],
+            "misses": _stats["misses"],
+            "hit_ratio": round(_stats["hits"] / lookups, 4) if lookups else 0.0,
+            "invalidations": _stats["invalidations"],
+            "pipelines": {k: dict(v, avg_ms=round(v["total_ms"] / v["runs"], 3))
+                          for k, v in _stats["pipelines"].items()},
+        }
+
+
+# writes that keep the analytics cache honest
+
+def create_restaurant(doc):
+    result = get_restaurants().insert_one(doc)
+    invalidate()
+    return result
+
+
+def update_restaurant(query, update, many=False):
+    restaurants = get_restaurants()
+    result = restaurants.update_many(query, update) if many else restaurants.update_one(query, update)
+    invalidate()
+    return result
+
+
+def delete_restaurant(query, many=False):
+    restaurants = get_restaurants()
+    result = restaurants.delete_many(query) if many else restaurants.delete_one(query)
+    invalidate()
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="cached restaurant analytics")
+    commands = parser.add_subparsers(dest='command', required=True)
+    counts_cmd = commands.add_parser('counts', help="restaurants per value of a field")
+    counts_cmd.add_argument('field', choices=GROUP_FIELDS)
+    top_cmd = commands.add_parser('top', help="top values of a field within each group")
+    top_cmd.add_argument('field', choices=GROUP_FIELDS)
+    top_cmd.add_argument('--by', choices=GROUP_FIELDS, default='address.zipcode')
+    top_cmd.add_argument('--n', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == 'counts':
+        result = counts_by(args.field)
+    else:
+        result = top_n(args.field, args.by, args.n)
+    print(json.dumps(result, indent=2))
+    print(json.dumps(metrics(), indent=2))